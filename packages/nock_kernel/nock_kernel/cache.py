@@ -0,0 +1,134 @@
+"""Remember the products of evaluations across cells
+
+Entries are keyed on the cell [subject formula], so a lookup hashes by
+mug (cached in each cell after the first time) and confirms a match by
+structural equality.  The cache is bounded by an estimate of the memory
+its subjects, formulas and products hold, and forgets the least
+recently used entries first.  Each subject is measured once, when an
+entry first uses it, and counted once however many entries share it.
+"""
+
+import sys
+from collections import OrderedDict
+
+from pinochle import Cell, deep, mug
+
+# a cell and the 31-bit mug it keeps once hashed, as every cell a key
+# holds will be
+_CELL_BYTES = sys.getsizeof(Cell(0, 0)) + sys.getsizeof(1 << 30)
+
+
+def footprint(n, limit=None):
+    """Estimate the bytes held by a noun, counting shared cells once;
+    once the estimate passes limit, stop and return it"""
+    seen = set()
+    total = 0
+    stack = [n]
+    while stack:
+        if limit is not None and total > limit:
+            break
+        n = stack.pop()
+        if deep(n):
+            if id(n) in seen:
+                continue
+            seen.add(id(n))
+            total += _CELL_BYTES
+            stack.append(n.tail)
+            stack.append(n.head)
+        elif n > 256:
+            # small ints are shared by the interpreter
+            total += sys.getsizeof(n)
+    return total
+
+
+class ResultCache:
+    """Products of *[subject formula], within max_bytes of nouns"""
+
+    def __init__(self, max_bytes=64 << 20):
+        self.max_bytes = max_bytes
+        # [subject formula] -> (product, bytes, subject)
+        self.data = OrderedDict()
+        # id(subject) -> [subject, bytes, entries], for subjects in use
+        self.subjects = {}
+        # (id, mug) of the last subject too big to cache against
+        self.oversized = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject, formula):
+        """The remembered product, or None"""
+        key = Cell(subject, formula)
+        entry = self.data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.data.move_to_end(key)
+        return entry[0]
+
+    def put(self, subject, formula, product):
+        held = self.subjects.get(id(subject))
+        if held is None:
+            # a subject is measured once, however many entries use it
+            tag = (id(subject), mug(subject))
+            if tag == self.oversized:
+                return
+            held = [subject, footprint(subject, self.max_bytes), 0]
+            if held[1] > self.max_bytes:
+                self.oversized = tag
+                return
+        size = footprint(Cell(formula, product), self.max_bytes)
+        if held[1] + size > self.max_bytes:
+            return
+        key = Cell(subject, formula)
+        old = self.data.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+            self.release(old[2])
+        if held[2] == 0:
+            self.subjects[id(subject)] = held
+            self.bytes += held[1]
+        held[2] += 1
+        self.data[key] = (product, size, subject)
+        self.bytes += size
+        self.evict()
+
+    def release(self, subject):
+        """Drop an entry's hold on its subject"""
+        held = self.subjects[id(subject)]
+        held[2] -= 1
+        if held[2] == 0:
+            del self.subjects[id(subject)]
+            self.bytes -= held[1]
+
+    def evict(self):
+        """Forget the oldest entries until within max_bytes"""
+        while self.bytes > self.max_bytes:
+            _, (_, size, subject) = self.data.popitem(last=False)
+            self.bytes -= size
+            self.release(subject)
+
+    def resize(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.evict()
+
+    def clear(self):
+        """Forget every entry and reset the counters"""
+        self.data.clear()
+        self.subjects.clear()
+        self.oversized = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.data), 'subjects': len(self.subjects),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes}
+
+    def __len__(self):
+        return len(self.data)
@@ -1,8 +1,16 @@
 from ipykernel.kernelbase import Kernel
-from pinochle import nock, to_noun, parse, pretty
+from pinochle import (to_noun, parse, pretty, cue_from_file, jam_to_file,
+                      OutOfBudget)
+import os
+import statistics
+import threading
+import time
 import traceback
 import re
 
+from .cache import ResultCache
+from .worker import Worker, WorkerStopped, measure
+
 def preprocess_hoon_syntax(code):
     """Convert Hoon syntax to plain Nock syntax
     
@@ -14,6 +22,50 @@ def preprocess_hoon_syntax(code):
     code = re.sub(r'%(\d+)', r'\1', code)
     return code
 
+def format_seconds(t):
+    """A duration in the unit that suits it"""
+    if t >= 1:
+        return "%.3f s" % t
+    if t >= 1e-3:
+        return "%.3f ms" % (t * 1e3)
+    return "%.1f us" % (t * 1e6)
+
+def format_bytes(n):
+    """A size in the unit that suits it"""
+    for unit in ('bytes', 'KB', 'MB'):
+        if n < 1024 or unit == 'MB':
+            break
+        n /= 1024
+    return ("%d %s" if unit == 'bytes' else "%.1f %s") % (n, unit)
+
+def format_bench(times):
+    """Summarize the times of repeated runs"""
+    spread = statistics.stdev(times) if len(times) > 1 else 0.0
+    return "%d runs: min %s, median %s, max %s, stdev %s" % (
+        len(times), format_seconds(min(times)),
+        format_seconds(statistics.median(times)),
+        format_seconds(max(times)), format_seconds(spread))
+
+def format_profile(report):
+    """Lay out a profile report as a table"""
+    lines = ["Steps: %d in %s (max depth %d)" % (
+                 report['steps'], format_seconds(report['elapsed']),
+                 report['max_depth']),
+             "Cells allocated: %d" % report['cells'],
+             "",
+             "%-8s %10s %7s %12s" % ('opcode', 'steps', 'share', 'time')]
+    steps = report['steps'] or 1
+    ops = sorted(report['ops'].items(), key=lambda kv: -kv[1])
+    for op, count in ops:
+        lines.append("%-8s %10d %6.1f%% %12s" % (
+            op, count, 100 * count / steps,
+            format_seconds(report['seconds'].get(op, 0.0))))
+    if report['hot']:
+        lines += ["", "Hottest formulas:"]
+        for count, text in report['hot']:
+            lines.append("%10d  %s" % (count, text))
+    return '\n'.join(lines)
+
 class NockKernel(Kernel):
     implementation = 'Nock'
     implementation_version = '1.0'
@@ -46,26 +98,73 @@ For help, type :help
         }
     ]
     variables = {}
+    # bounds on printed results, so huge nouns don't stall the frontend
+    display_limits = {'max_length': 100000, 'max_items': 1000}
+    # evaluation budget; None means unlimited
+    max_steps = None
+    max_seconds = 60.0
+    # evaluate in a supervised worker process, so a runaway formula can
+    # be stopped without losing the kernel
+    use_worker = True
+    # remember products across cells, within this many bytes of nouns
+    cache_bytes = 64 << 20
+    # runs a :bench makes unless told otherwise
+    bench_runs = 5
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.subject = 0  # Default subject
         self.last_result = None
+        self.cancel = threading.Event()  # set to stop the running formula
+        # start the worker now, so the first evaluation finds it warm
+        self.worker = Worker() if self.use_worker else None
+        self.cache = ResultCache(self.cache_bytes)
+        self.use_cache = True  # False while running a :nocache cell
 
-    def substitute_variables(self, code):
-        """Replace variable names with their values in the code string"""
-        import re
-        
-        # Find all potential variable references (words that aren't inside brackets/quotes)
-        # We'll do a simple approach: replace whole words that match variable names
-        for var_name in self.variables:
-            # Use word boundaries to avoid partial matches
-            # Match the variable name when it's not part of a larger word
-            pattern = r'\b' + re.escape(var_name) + r'\b'
-            replacement = pretty(self.variables[var_name], False)
-            code = re.sub(pattern, replacement, code)
-        
-        return code
+    def read(self, code):
+        """Parse a noun, splicing in the values of any variables it names
+
+        The stored nouns are shared, not printed and parsed again, so the
+        cost follows the length of the code rather than of the variables.
+        """
+        return parse(code, names=self.variables)
+
+    def show(self, n):
+        """Pretty-print a noun for display, within display_limits"""
+        return pretty(n, False, **self.display_limits)
+
+    def evaluate(self, subject, formula):
+        """Run nock within this kernel's budget, in the worker if enabled
+
+        Products are cached on [subject formula], unless the cell opted out.
+        """
+        if self.use_cache:
+            result = self.cache.get(subject, formula)
+            if result is not None:
+                return result
+        result = self.measure(subject, formula)[0]
+        if self.use_cache:
+            self.cache.put(subject, formula, result)
+        return result
+
+    def measure(self, subject, formula, repeat=1, profile=False):
+        """Run nock uncached, returning the product and the times of
+        repeat runs, or if profile is set a profile report"""
+        self.cancel.clear()
+        if self.use_worker:
+            if self.worker is None:
+                self.worker = Worker()
+            return self.worker.measure(subject, formula, self.max_steps,
+                                       self.max_seconds, self.cancel,
+                                       repeat, profile)
+        return measure(subject, formula, self.max_steps, self.max_seconds,
+                       self.cancel, repeat, profile)
+
+    def do_shutdown(self, restart):
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
+        return super().do_shutdown(restart)
 
     def do_execute(self, code, silent, store_history=True, user_expressions=None,
                allow_stdin=False):
@@ -75,90 +174,188 @@ For help, type :help
             return {'status': 'ok', 'execution_count': self.execution_count,
                     'payload': [], 'user_expressions': {}}
         
+        self.use_cache = True
         try:
             code = code.strip()
 
+            # `:nocache <code>` runs code without the result cache
+            if code.split(None, 1)[0] == ':nocache':
+                self.use_cache = False
+                code = code[8:].strip()
+
             # Preprocess Hoon syntax (convert %N to N)
             code = preprocess_hoon_syntax(code)
+            # commands are matched on the whole word, so `:cached` can
+            # still name a variable
+            command = code.split(None, 1)[0] if code else ''
 
             # Handle Hoon dottar syntax: .*(subject formula)
             if code.startswith('.*(') and code.endswith(')'):
                 # Extract the content between .*( and )
                 inner = code[3:-1].strip()
-                inner = self.substitute_variables(inner)
                 # Parse as a cell [subject formula]
-                expr = parse(inner)
+                expr = self.read(inner)
                 if not hasattr(expr, 'head'):
                     output = "Error: .*() requires [subject formula]"
                 else:
-                    result = nock(expr.head, expr.tail)
+                    result = self.evaluate(expr.head, expr.tail)
                     self.last_result = result
                     # Also update subject to match what was used
                     self.subject = expr.head
-                    output = pretty(result, False)
+                    output = self.show(result)
             
             # Handle special commands
-            elif code.startswith(':subject'):
-                # Set subject: `:subject [1 2 3]`
+            elif command == ':subject':
+                # Set subject: `:subject [1 2 3]` or `:subject path/to/file.jam`
                 subject_str = code[8:].strip()
-                subject_str = self.substitute_variables(subject_str)
-                self.subject = parse(subject_str)
-                output = f"Subject set to: {pretty(self.subject, False)}"
+                if subject_str.endswith('.jam'):
+                    self.subject = cue_from_file(subject_str)
+                    output = f"Subject loaded from {subject_str}"
+                else:
+                    self.subject = self.read(subject_str)
+                    output = f"Subject set to: {self.show(self.subject)}"
                 
-            elif code.startswith(':formula'):
+            elif command == ':formula':
                 # Evaluate formula against current subject: `:formula [0 1]`
                 formula_str = code[8:].strip()
-                formula_str = self.substitute_variables(formula_str)
-                formula = parse(formula_str)
-                result = nock(self.subject, formula)
+                formula = self.read(formula_str)
+                result = self.evaluate(self.subject, formula)
                 self.last_result = result
-                output = pretty(result, False)
+                output = self.show(result)
                 
-            elif code.startswith(':nock'):
+            elif command == ':nock':
                 # Full nock expression: `:nock [subject formula]`
                 expr_str = code[5:].strip()
-                expr_str = self.substitute_variables(expr_str)
-                expr = parse(expr_str)
+                expr = self.read(expr_str)
                 if not hasattr(expr, 'head'):
                     output = "Error: :nock requires [subject formula]"
                 else:
-                    result = nock(expr.head, expr.tail)
+                    result = self.evaluate(expr.head, expr.tail)
                     self.last_result = result
-                    output = pretty(result, False)
+                    output = self.show(result)
                     
-            elif code.startswith(':show'):
+            elif command == ':bench':
+                # Time a formula against the subject: `:bench -n 20 [0 1]`
+                match = re.match(r':bench\s+(?:-n\s*(\d+)\s+)?(.+)', code, re.S)
+                if not match:
+                    raise ValueError("Use :bench [-n <runs>] <formula>")
+                repeat = int(match.group(1) or self.bench_runs)
+                formula = self.read(match.group(2))
+                result, times = self.measure(self.subject, formula,
+                                             repeat=max(repeat, 1))
+                self.last_result = result
+                output = format_bench(times)
+
+            elif command == ':profile':
+                # Count what a formula does: `:profile [4 0 1]`
+                formula = self.read(code[8:].strip())
+                result, report = self.measure(self.subject, formula,
+                                              profile=True)
+                self.last_result = result
+                output = format_profile(report)
+
+            elif command in (':load', ':save'):
+                # `:load name path.jam` cues a file into a variable, and
+                # `:save name path.jam` jams a variable into a file
+                match = re.match(r':(load|save)\s+([a-zA-Z_][a-zA-Z0-9_-]*)'
+                                 r'\s+(.+)', code)
+                if not match:
+                    raise ValueError("Use :load|:save <varname> <file.jam>")
+                _, var_name, path = match.groups()
+                path = os.path.expanduser(path.strip())
+                start = time.perf_counter()
+                if command == ':load':
+                    self.variables[var_name] = cue_from_file(path)
+                    size = os.path.getsize(path)
+                    verb = "Loaded '%s' from" % var_name
+                elif var_name in self.variables:
+                    size = jam_to_file(self.variables[var_name], path)
+                    verb = "Saved '%s' to" % var_name
+                else:
+                    raise ValueError(f"Variable '{var_name}' not found")
+                output = "%s %s: %s in %s" % (
+                    verb, path, format_bytes(size),
+                    format_seconds(time.perf_counter() - start))
+
+            elif command == ':show':
                 # Show current state or specific variable
                 parts = code.split(None, 1)  # Split on first whitespace
                 
                 if len(parts) == 1:
                     # :show with no args - show everything
-                    output = f"Subject: {pretty(self.subject, False)}\n"
+                    output = f"Subject: {self.show(self.subject)}\n"
                     if self.last_result is not None:
-                        output += f"Last result: {pretty(self.last_result, False)}\n"
+                        output += f"Last result: {self.show(self.last_result)}\n"
                     
                     # Check if variables dict exists
                     if hasattr(self, 'variables') and self.variables:
                         output += "\nVariables:\n"
                         for var_name, var_value in self.variables.items():
-                            output += f"  {var_name} = {pretty(var_value, False)}\n"
+                            output += f"  {var_name} = {self.show(var_value)}\n"
                     else:
                         output += "\nNo variables defined"
                 else:
                     # :show varname - show specific variable
                     var_name = parts[1].strip()
                     if hasattr(self, 'variables') and var_name in self.variables:
-                        output = f"{var_name} = {pretty(self.variables[var_name], False)}"
+                        output = f"{var_name} = {self.show(self.variables[var_name])}"
                     else:
                         output = f"Variable '{var_name}' not found"                    
 
-            elif code.startswith(':help'):
+            elif command == ':budget':
+                # `:budget`, `:budget steps 1000000`, `:budget seconds off`
+                parts = code.split()
+                if len(parts) == 3 and parts[1] in ('steps', 'seconds'):
+                    if parts[2] == 'off':
+                        value = None
+                    elif parts[1] == 'steps':
+                        value = int(parts[2])
+                    else:
+                        value = float(parts[2])
+                    setattr(self, 'max_' + parts[1], value)
+                elif len(parts) != 1:
+                    raise ValueError("Use :budget steps|seconds <n>|off")
+                limits = ['unlimited' if v is None else v
+                          for v in (self.max_steps, self.max_seconds)]
+                output = "Budget: steps %s, seconds %s" % tuple(limits)
+
+            elif command == ':cache':
+                # `:cache`, `:cache clear`, `:cache bytes 1000000`
+                parts = code.split()
+                if parts[1:] == ['clear']:
+                    self.cache.clear()
+                elif len(parts) == 3 and parts[1] == 'bytes':
+                    self.cache.resize(int(parts[2]))
+                elif len(parts) != 1:
+                    raise ValueError("Use :cache [clear | bytes <n>]")
+                stats = self.cache.stats()
+                output = ("Cache: %(entries)d entries on %(subjects)d "
+                          "subjects, %(bytes)d of "
+                          "%(max_bytes)d bytes; %(hits)d hits, "
+                          "%(misses)d misses (%(hit_rate).0f%% hit rate)"
+                          % dict(stats, hit_rate=100 * stats['hit_rate']))
+
+            elif command == ':help':
                 output = """Nock Kernel Commands:
     :subject <noun>    - Set the subject for subsequent formulas
+    :subject <file.jam> - Load the subject from a jammed noun file
     :formula <formula> - Evaluate formula against current subject
     :nock <expr>       - Evaluate full nock expression [subject formula]
     :show              - Show current subject and last result
     :<varname>         - Define variable 'varname' with a noun value
     :show <varname>    - Show value of variable 'varname'
+    :budget            - Show the step and time limits on evaluation
+    :budget steps <n>  - Limit evaluation to n steps (or 'off')
+    :budget seconds <s> - Limit evaluation to s seconds (or 'off')
+    :cache             - Show the result cache's size and hit rate
+    :cache clear       - Empty the result cache
+    :cache bytes <n>   - Bound the result cache to n bytes of nouns
+    :nocache <code>    - Run code without the result cache
+    :load <varname> <file.jam> - Load a jammed noun into a variable
+    :save <varname> <file.jam> - Save a variable as a jammed noun
+    :bench <formula>   - Time repeated runs of formula against the subject
+    :bench -n <runs> <formula> - Time that many runs
+    :profile <formula> - Count the opcodes, cells and hot formulas of a run
     :help              - Show this help message
 
     Hoon Syntax:
@@ -184,23 +381,20 @@ For help, type :help
                 if match:
                     var_name = match.group(1)
                     var_value_str = match.group(2).strip()
-                    # SUBSTITUTE VARIABLES BEFORE PARSING
-                    var_value_str = self.substitute_variables(var_value_str)
-                    var_value = parse(var_value_str)
+                    var_value = self.read(var_value_str)
                     if not hasattr(self, 'variables'):
                         self.variables = {}
                     self.variables[var_name] = var_value
-                    output = f"Variable '{var_name}' set to: {pretty(var_value, False)}"
+                    output = f"Variable '{var_name}' set to: {self.show(var_value)}"
                 else:
                     output = "Error: Invalid variable assignment syntax. Use :varname <noun>"
                     self.last_result = None
             else:
                 # Default: treat as formula against current subject
-                code = self.substitute_variables(code)
-                formula = parse(code)
-                result = nock(self.subject, formula)
+                formula = self.read(code)
+                result = self.evaluate(self.subject, formula)
                 self.last_result = result
-                output = pretty(result, False)
+                output = self.show(result)
             
             if not silent:
                 stream_content = {'name': 'stdout', 'text': output + '\n'}
@@ -211,11 +405,27 @@ For help, type :help
                     'payload': [],
                     'user_expressions': {}}
 
+        except (OutOfBudget, WorkerStopped) as e:
+            if not silent:
+                error_content = {
+                    'name': 'stderr',
+                    'text': f"Stopped: {e}; the kernel's state is unchanged\n"
+                }
+                self.send_response(self.iopub_socket, 'stream', error_content)
+
+            return {'status': 'error',
+                    'execution_count': self.execution_count,
+                    'ename': type(e).__name__,
+                    'evalue': str(e),
+                    'traceback': []}
+
         except Exception as e:
             if not silent:
+                # errors raised in the worker carry its traceback
+                tb = getattr(e, 'remote_traceback', None) or traceback.format_exc()
                 error_content = {
                     'name': 'stderr',
-                    'text': f"Error: {str(e)}\n{traceback.format_exc()}"
+                    'text': f"Error: {str(e)}\n{tb}"
                 }
                 self.send_response(self.iopub_socket, 'stream', error_content)
 
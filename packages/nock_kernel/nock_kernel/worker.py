@@ -0,0 +1,244 @@
+"""Run nock in a supervised worker process
+
+The kernel keeps its subject and variables; the worker only evaluates.
+Nouns travel both ways jammed, so the cost of a transfer follows the
+size of the noun; the worker keeps the last subject it was sent, which
+is only sent again when it changes.  A worker that overruns its time,
+is interrupted or dies is replaced by a fresh one, and the kernel
+carries on.
+"""
+
+import multiprocessing
+import signal
+import time
+import traceback
+
+from pinochle import (nock, jam_bytes, cue, mug, pretty, Budget, OutOfBudget,
+                      Profile)
+
+# how much of each hot formula a profile shows
+FORMULA_WIDTH = 60
+
+
+class WorkerError(Exception):
+    """An evaluation raised in the worker; ename and remote_traceback
+    describe the original exception"""
+
+    def __init__(self, ename, message, remote_traceback):
+        super().__init__(message)
+        self.ename = ename
+        self.remote_traceback = remote_traceback
+
+
+class WorkerStopped(Exception):
+    """An evaluation was interrupted, timed out or lost its worker"""
+
+
+def measure(subject, formula, steps=None, seconds=None, token=None,
+            repeat=1, profile=False):
+    """Evaluate *[subject formula] within a budget, returning the product
+    and what was measured: the time of each of repeat runs, or if
+    profile is set a Profile's report, whose hot formulas are given as
+    (count, text).  Each run gets a budget of its own."""
+    if profile:
+        budget = Budget(steps=steps, seconds=seconds, token=token)
+        texts = {}
+        def sample(m, f):
+            if m not in texts:
+                texts[m] = pretty(f, False, max_length=FORMULA_WIDTH)
+        p = Profile(sample=sample)
+        start = time.perf_counter()
+        product = nock(subject, formula, profile=p, budget=budget)
+        report = p.report()
+        report['elapsed'] = time.perf_counter() - start
+        report['hot'] = [(count, texts[m]) for m, count in report['hot']]
+        return product, report
+    times = []
+    for _ in range(repeat):
+        budget = Budget(steps=steps, seconds=seconds, token=token)
+        start = time.perf_counter()
+        product = nock(subject, formula, budget=budget)
+        times.append(time.perf_counter() - start)
+    return product, times
+
+
+def _serve(conn, cancel):
+    """The worker's loop: evaluate requests until the pipe closes"""
+    # interrupts are the supervisor's to handle, through cancel
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    subject = None  # the resident subject
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        sent, formula, steps, seconds, repeat, profile = request
+        try:
+            if sent is not None:
+                subject = None
+                subject = cue(sent)
+            formula = cue(formula)
+        except Exception as e:
+            conn.send(('error', type(e).__name__, str(e),
+                       traceback.format_exc()))
+            continue
+        # the budget starts now, not while the subject was in transit
+        conn.send(('started',))
+        try:
+            product, measured = measure(subject, formula, steps, seconds,
+                                        cancel, repeat, profile)
+            reply = ('ok', jam_bytes(product), measured)
+        except OutOfBudget as e:
+            reply = ('budget', e.reason, e.steps)
+        except Exception as e:
+            reply = ('error', type(e).__name__, str(e), traceback.format_exc())
+        conn.send(reply)
+
+
+def _same(a, b):
+    """Whether two nouns are equal, cheaply if they are the same object"""
+    return a is b or (mug(a) == mug(b) and a == b)
+
+
+class Worker:
+    """A warm worker process that evaluates one formula at a time"""
+
+    # how often the supervisor looks at the worker while it runs
+    poll_interval = 0.05
+    # how long a worker gets to stop by itself before it is killed
+    grace = 2.0
+
+    def __init__(self, context='spawn'):
+        self.context = multiprocessing.get_context(context)
+        self.process = None
+        self.start()
+
+    def start(self):
+        """Start a fresh worker process"""
+        self.conn, child = self.context.Pipe()
+        self.cancel = self.context.Event()
+        self.cancelled = None  # when the worker was asked to stop
+        self.resident = None   # the subject the worker holds, if known
+        self.process = self.context.Process(target=_serve,
+                                            args=(child, self.cancel),
+                                            daemon=True)
+        self.process.start()
+        child.close()
+
+    def restart(self):
+        """Kill the worker and start another"""
+        self.kill()
+        self.start()
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+        if self.process is not None:
+            self.process.join()
+        self.conn.close()
+
+    def close(self):
+        """Ask the worker to exit, killing it if it doesn't"""
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(self.grace)
+        self.kill()
+        self.process = None
+
+    def run(self, subject, formula, steps=None, seconds=None, token=None):
+        """Evaluate *[subject formula] in the worker.
+
+        steps and seconds bound the evaluation as a Budget would, and
+        OutOfBudget is raised the same way; the time taken to send a new
+        subject doesn't count against them.  Setting token (a
+        threading.Event) or interrupting the caller cancels it.  A
+        worker that doesn't stop within grace of its deadline or of a
+        cancellation is killed and replaced, and WorkerStopped raised.
+        """
+        return self.measure(subject, formula, steps, seconds, token)[0]
+
+    def measure(self, subject, formula, steps=None, seconds=None, token=None,
+                repeat=1, profile=False):
+        """As run, but returning the product and what measure() found,
+        timed or profiled in the worker"""
+        if self.process is None or not self.process.is_alive():
+            self.start()
+        self.cancel.clear()
+        self.cancelled = None
+        try:
+            if self.resident is not None and _same(subject, self.resident):
+                sent = None
+            else:
+                # until the worker has it, the worker's subject is unknown
+                self.resident = None
+                sent = jam_bytes(subject)
+            request = (sent, jam_bytes(formula), steps, seconds, repeat,
+                       profile)
+        except KeyboardInterrupt:
+            # nothing has reached the worker yet
+            raise WorkerStopped('interrupted')
+        try:
+            self.conn.send(request)
+        except KeyboardInterrupt:
+            # part of the request may be on the pipe, so the worker
+            # can't be trusted to read the next one
+            self.restart()
+            raise WorkerStopped('interrupted; the worker was restarted')
+        except OSError:
+            self.restart()
+            raise WorkerStopped('the worker died; it has been restarted')
+        try:
+            reply = self.receive(None, token)
+            if reply[0] == 'started':
+                self.resident = subject
+                # each of the repeat runs has seconds of its own
+                limit = None if seconds is None else seconds * repeat
+                reply = self.receive(limit, token)
+        except KeyboardInterrupt:
+            self.cancel.set()
+            while self.conn.poll(self.grace):
+                try:
+                    message = self.conn.recv()
+                except (EOFError, OSError):
+                    break
+                if message[0] != 'started':
+                    raise WorkerStopped('interrupted')
+                self.resident = subject
+            self.restart()
+            raise WorkerStopped('interrupted; the worker was restarted')
+        if reply[0] == 'ok':
+            return cue(reply[1]), reply[2]
+        if reply[0] == 'budget':
+            raise OutOfBudget(reply[1], reply[2])
+        raise WorkerError(reply[1], reply[2], reply[3])
+
+    def receive(self, seconds, token):
+        """Wait for the worker's next message, for at most seconds (and
+        grace) if given, restarting the worker if it dies or won't stop"""
+        deadline = None if seconds is None else time.monotonic() + seconds
+        while not self.conn.poll(self.poll_interval):
+            now = time.monotonic()
+            if not self.process.is_alive():
+                self.restart()
+                raise WorkerStopped('the worker died; it has been restarted')
+            if self.cancelled is None and token is not None and token.is_set():
+                self.cancel.set()
+                self.cancelled = now
+            if self.cancelled is not None and now > self.cancelled + self.grace:
+                self.restart()
+                raise WorkerStopped('cancelled; the worker was restarted')
+            if deadline is not None and now > deadline + self.grace:
+                self.restart()
+                raise WorkerStopped('timed out after %g seconds; '
+                                    'the worker was restarted' % seconds)
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.restart()
+            raise WorkerStopped('the worker died; it has been restarted')
@@ -0,0 +1,87 @@
+import sys
+import pytest
+from pinochle import Cell, parse
+import nock_kernel.cache as cache_module
+from nock_kernel.cache import ResultCache, footprint
+
+CELL = cache_module._CELL_BYTES
+
+def build_list(n, start=0):
+    x = 0
+    for i in range(n):
+        x = Cell(start + i % 200, x)
+    return x
+
+@pytest.mark.parametrize("noun, size", [
+    (5, 0),
+    (Cell(1, 2), CELL),
+    (parse("[[1 2] 3 4]"), 3 * CELL),
+    (1 << 1000, sys.getsizeof(1 << 1000)),
+    (build_list(100), 100 * CELL),
+])
+def test_footprint(noun, size):
+    assert footprint(noun) == size
+
+def test_footprint_counts_shared_cells_once():
+    x = parse("[1 2]")
+    assert footprint(Cell(x, x)) == 2 * CELL
+
+def test_footprint_stops_past_limit():
+    assert CELL * 10 < footprint(build_list(100000), CELL * 10) < CELL * 20
+
+def test_hits_and_misses():
+    cache = ResultCache()
+    subject, formula = parse("[1 2]"), parse("[0 2]")
+    assert cache.get(subject, formula) is None
+    cache.put(subject, formula, 1)
+    # equal nouns find the entry, whatever their identity
+    assert cache.get(parse("[1 2]"), parse("[0 2]")) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    cache.clear()
+    assert len(cache) == 0 and cache.bytes == 0 and not cache.subjects
+
+def test_subjects_count_once():
+    cache = ResultCache()
+    subject = build_list(1000)
+    for axis in range(2, 12):
+        cache.put(subject, Cell(0, axis), axis)
+    assert len(cache.subjects) == 1
+    assert footprint(subject) < cache.bytes < 2 * footprint(subject)
+
+def test_bounded_with_subjects():
+    cache = ResultCache(max_bytes=200000)
+    subjects = [build_list(1000, i) for i in range(20)]
+    for subject in subjects:
+        cache.put(subject, parse("[0 2]"), 0)
+        assert cache.bytes <= cache.max_bytes
+    held = [s for s, _, _ in cache.subjects.values()]
+    assert 0 < len(held) < len(subjects)
+    assert sum(footprint(s) for s in held) <= cache.max_bytes
+    # the oldest subjects are no longer held
+    assert all(held_subject is not subjects[0] for held_subject in held)
+    assert cache.bytes == sum(footprint(s) for s in held) + sum(
+        size for _, size, _ in cache.data.values())
+
+def test_replacing_an_entry_keeps_the_count():
+    cache = ResultCache()
+    subject, formula = build_list(100), parse("[0 2]")
+    cache.put(subject, formula, 1)
+    before = cache.bytes
+    cache.put(subject, formula, 1)
+    cache.put(build_list(100), formula, 1)  # equal, but another object
+    assert cache.bytes == before and len(cache.subjects) == 1
+
+def test_oversized_subject_measured_once(monkeypatch):
+    cache = ResultCache(max_bytes=10000)
+    walked = []
+    measure = cache_module.footprint
+    def counting(n, limit=None):
+        walked.append(n)
+        return measure(n, limit)
+    monkeypatch.setattr(cache_module, 'footprint', counting)
+    subject = build_list(50000)
+    for axis in range(2, 6):
+        cache.put(subject, Cell(0, axis), 0)
+    assert len(cache) == 0 and cache.bytes == 0
+    assert sum(n is subject for n in walked) == 1
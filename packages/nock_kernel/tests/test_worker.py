@@ -0,0 +1,125 @@
+import os
+import signal
+import threading
+import time
+import pytest
+from pinochle import Cell, parse, OutOfBudget
+import nock_kernel.worker as worker_module
+from nock_kernel.worker import Worker, WorkerError, WorkerStopped
+
+# *[0 LOOP] never returns
+LOOP = parse("[8 [1 9 2 0 1] 9 2 0 1]")
+HEAD = parse("[0 2]")
+
+
+class Freezing(Worker):
+    """A worker that stops responding once it starts evaluating"""
+
+    freeze = False
+
+    def receive(self, seconds, token):
+        reply = super().receive(seconds, token)
+        if self.freeze and reply[0] == 'started':
+            os.kill(self.process.pid, signal.SIGSTOP)
+        return reply
+
+
+@pytest.fixture
+def worker():
+    w = Freezing()
+    # wait for the process to start, so grace counts from a running worker
+    w.run(0, parse("[1 0]"))
+    w.grace = 0.3
+    yield w
+    w.close()
+
+
+def test_run(worker):
+    assert worker.run(Cell(41, 42), parse("[4 0 2]")) == 42
+    product, times = worker.measure(5, parse("[4 0 1]"), repeat=3)
+    assert product == 6 and len(times) == 3
+
+
+def test_errors_and_budgets(worker):
+    with pytest.raises(WorkerError, match="fail: atom"):
+        worker.run(5, HEAD)
+    with pytest.raises(OutOfBudget) as e:
+        worker.run(0, LOOP, steps=1000)
+    assert e.value.reason == 'steps'
+    with pytest.raises(OutOfBudget) as e:
+        worker.run(0, LOOP, seconds=0.1)
+    assert e.value.reason == 'deadline'
+    assert worker.run(Cell(1, 2), HEAD) == 1
+
+
+def test_resident_subject(worker, monkeypatch):
+    jammed = []
+    jam_bytes = worker_module.jam_bytes
+    def counting(n):
+        jammed.append(n)
+        return jam_bytes(n)
+    monkeypatch.setattr(worker_module, 'jam_bytes', counting)
+    subject = parse("[[1 2] 3 4]")
+    assert worker.run(subject, HEAD) == Cell(1, 2)
+    assert worker.run(subject, parse("[0 7]")) == 4
+    # an equal subject isn't sent again either
+    assert worker.run(parse("[[1 2] 3 4]"), parse("[0 6]")) == 3
+    assert sum(n is subject for n in jammed) == 1
+    assert worker.run(Cell(5, 6), HEAD) == 5
+    assert worker.resident == Cell(5, 6)
+
+
+def test_cancel(worker):
+    token = threading.Event()
+    threading.Timer(0.2, token.set).start()
+    with pytest.raises(OutOfBudget) as e:
+        worker.run(0, LOOP, token=token)
+    assert e.value.reason == 'cancelled'
+    assert worker.run(Cell(1, 2), HEAD) == 1
+
+
+def test_cancel_unresponsive(worker):
+    worker.freeze = True
+    token = threading.Event()
+    threading.Timer(0.2, token.set).start()
+    with pytest.raises(WorkerStopped, match="cancelled"):
+        worker.run(0, LOOP, token=token)
+    worker.freeze = False
+    assert worker.run(Cell(1, 2), HEAD) == 1
+
+
+def test_timeout(worker):
+    worker.freeze = True
+    start = time.monotonic()
+    with pytest.raises(WorkerStopped, match="timed out"):
+        worker.run(0, LOOP, seconds=0.2)
+    assert time.monotonic() - start < 5
+    worker.freeze = False
+    assert worker.run(Cell(1, 2), HEAD) == 1
+
+
+def test_worker_death(worker):
+    subject = Cell(7, 8)
+    assert worker.run(subject, HEAD) == 7
+    pid = worker.process.pid
+    threading.Timer(0.2, lambda: os.kill(pid, signal.SIGKILL)).start()
+    with pytest.raises(WorkerStopped, match="died"):
+        worker.run(subject, LOOP)
+    assert worker.resident is None
+    assert worker.process.pid != pid
+    assert worker.run(subject, HEAD) == 7
+
+
+def test_interrupted_send(worker):
+    pid = worker.process.pid
+    class Interrupted:
+        def send(self, request):
+            raise KeyboardInterrupt
+        def close(self):
+            pass
+    # restarting replaces the connection
+    worker.conn = Interrupted()
+    with pytest.raises(WorkerStopped, match="restarted"):
+        worker.run(Cell(1, 2), HEAD)
+    assert worker.process.pid != pid
+    assert worker.run(Cell(1, 2), HEAD) == 1
@@ -0,0 +1,8 @@
+"""
+Benchmarks for pinochle: canonical Nock workloads and noun operations.
+
+    python -m bench [names...] [--json FILE] [--save-baseline]
+
+Run from packages/pinochle.  See bench/__main__.py for the options and
+bench/workloads.py for what is measured.
+"""
@@ -0,0 +1,136 @@
+"""
+Run the benchmarks, print a table, and compare with a stored baseline.
+
+    python -m bench                       # every workload
+    python -m bench fib jam               # just these
+    python -m bench --json out.json       # also write the results
+    python -m bench --save-baseline       # make these the new baseline
+
+Each workload is run --repeat times and its best time is kept.  When
+the baseline file exists, every result is shown as a ratio to it, and
+the exit status is 1 if any workload is slower than the baseline by
+more than --tolerance.  Baselines are machine-specific: save one on the
+machine you compare on.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import pinochle
+
+from .workloads import WORKLOADS
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+def measure(setup, scale: int, repeat: int) -> dict:
+    """time the workload setup builds, repeat times"""
+
+    work = setup(scale)
+    prepare, run = work if isinstance(work, tuple) else (None, work)
+    times = []
+    for _ in range(repeat):
+        arg = prepare() if prepare is not None else None
+        start = time.perf_counter()
+        if prepare is not None:
+            run(arg)
+        else:
+            run()
+        times.append(time.perf_counter() - start)
+    return {'best': min(times), 'median': statistics.median(times),
+            'repeat': repeat}
+
+def run_all(names, scale: int, repeat: int) -> dict:
+    results = {}
+    for name in names:
+        results[name] = measure(WORKLOADS[name], scale, repeat)
+    return {
+        'pinochle': pinochle.__version__,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scale': scale,
+        'results': results,
+    }
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """print the results against baseline; return the slower names"""
+
+    slower = []
+    old = baseline.get('results', {}) if baseline else {}
+    if baseline and baseline.get('scale') != report['scale']:
+        print('baseline was run at scale %s; not comparing' %
+              baseline.get('scale'))
+        old = {}
+    print('%-12s %10s %10s %10s' % ('workload', 'best', 'median',
+                                     'vs base'))
+    for name, result in report['results'].items():
+        line = '%-12s %9.4fs %9.4fs' % (name, result['best'],
+                                         result['median'])
+        if name in old:
+            ratio = result['best'] / old[name]['best']
+            line += ' %9.2fx' % ratio
+            if ratio > 1 + tolerance:
+                line += '  slower'
+                slower.append(name)
+        print(line)
+    return slower
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m bench',
+                                     description='pinochle benchmarks')
+    parser.add_argument('names', nargs='*', metavar='workload',
+                        help='workloads to run (default: all of %s)' %
+                        ', '.join(WORKLOADS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--json', metavar='FILE',
+                        help='write the results as JSON ("-" for stdout)')
+    parser.add_argument('--baseline', metavar='FILE', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='write the results to the baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown before a workload counts '
+                        'as slower (default 0.25, i.e. 25%%)')
+    args = parser.parse_args(argv)
+
+    names = args.names or list(WORKLOADS)
+    unknown = [name for name in names if name not in WORKLOADS]
+    if unknown:
+        parser.error('unknown workload: %s' % ', '.join(unknown))
+
+    # deep nouns are built and compared on explicit stacks, but leave
+    # room for the few recursive helpers
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    report = run_all(names, args.scale, args.repeat)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    slower = compare(report, baseline, args.tolerance)
+
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                # keep workloads that weren't rerun
+                kept = json.load(f)
+            if kept.get('scale') == report['scale']:
+                kept['results'].update(report['results'])
+                report['results'] = kept['results']
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    return 1 if slower else 0
+
+if '__main__' == __name__:
+    sys.exit(main())
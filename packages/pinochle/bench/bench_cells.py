@@ -0,0 +1,61 @@
+"""
+Time and memory for building large nouns, with and without hash-consing.
+
+    python -m bench.bench_cells [cells]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from pinochle import Cell, HashCons
+
+def build_list(n: int, cons=Cell):
+    """[0 1 2 ... n-1 0]"""
+
+    x = 0
+    for i in range(n - 1, -1, -1):
+        x = cons(i, x)
+    return x
+
+def build_tree(depth: int, cons=Cell):
+    """a full binary tree of 2^depth - 1 cells over atoms 0 and 1"""
+
+    level = [0, 1] * (1 << (depth - 1))
+    while len(level) > 1:
+        level = [cons(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+    return level[0]
+
+def measure(label: str, build, cells: int, hash_cons=False):
+    """time one build, then trace the memory the result keeps in a second.
+    build takes the cons to use.  if hash_cons, each build gets a fresh
+    HashCons and the cells counted are the distinct ones in its table."""
+
+    def run():
+        table = HashCons() if hash_cons else None
+        return build(table.cons if hash_cons else Cell), table
+
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result, table = run()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if hash_cons:
+        cells = len(table)
+    del result, table
+    print('%-24s %9d cells %8.3fs %7.1f bytes/cell' %
+          (label, cells, elapsed, size / cells))
+
+if '__main__' == __name__:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    depth = n.bit_length() - 1
+    tree_cells = (1 << depth) - 1
+
+    measure('list', lambda cons: build_list(n, cons), n)
+    measure('list, hash-consed', lambda cons: build_list(n, cons), n, True)
+    measure('tree', lambda cons: build_tree(depth, cons), tree_cells)
+    # every level of the tree is one shared cell
+    measure('tree, hash-consed', lambda cons: build_tree(depth, cons),
+            tree_cells, True)
@@ -0,0 +1,60 @@
+"""
+Cost of opcode 6, against its reduction by the Nock spec.
+
+A decrement loop evaluates one conditional per step.  The same loop is
+run with opcode 6 and with each *[a 6 b c d] spelled out as
+
+    *[a 2 [0 1] 2 [1 c d] [1 0] 2 [1 2 3] [1 0] 4 4 b]
+
+which is the meta-evaluation the interpreter used to perform.
+
+    python -m bench.bench_if [steps]
+"""
+
+import sys
+import time
+
+from pinochle import Cell, nock, parse
+
+def expand_if(b, c, d):
+    return parse('[2 [0 1] 2 [1 %s %s] [1 0] 2 [1 2 3] [1 0] 4 4 %s]' % (c, d, b))
+
+TEST = '[5 [0 7] 4 0 6]'
+YES = '[0 6]'
+NO = '[9 2 [0 2] [4 0 6] 0 7]'
+
+def decrement(conditional):
+    return parse('[8 [1 0] 8 [1 %s] 9 2 0 1]' % conditional)
+
+def count_cells(run):
+    """how many cells run() constructs"""
+
+    init = Cell.__init__.__code__
+    count = 0
+    def profile(frame, event, arg):
+        nonlocal count
+        if event == 'call' and frame.f_code is init:
+            count += 1
+    sys.setprofile(profile)
+    try:
+        run()
+    finally:
+        sys.setprofile(None)
+    return count
+
+def measure(label: str, formula, steps: int):
+    run = lambda: nock(steps, formula)
+    run()
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    cells = count_cells(run)
+    print('%-10s %8.2f us/step %6.1f cells/step' %
+          (label, elapsed / steps * 1e6, cells / steps))
+
+if '__main__' == __name__:
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    direct = decrement('6 %s %s %s' % (TEST, YES, NO))
+    expanded = decrement(str(expand_if(TEST, YES, NO)))
+    measure('opcode 6', direct, steps)
+    measure('expanded', expanded, steps)
@@ -0,0 +1,76 @@
+"""
+Cost of to_noun conversion inside the interpreter.
+
+The public helpers fas and hax convert every argument with to_noun
+before they act.  The evaluator used to call them once per opcode; it
+now calls the unchecked primitives _fas and _hax, and converts only at
+the nock() boundary.  This times the same decrement loop both ways, by
+binding the evaluator's primitives to checked versions for the
+"before" run, and prints the time per million opcodes with the
+difference.
+
+The loop is run unfolded, one opcode per step, since folded closures
+walk their axes inline and call neither primitive; the folded time is
+printed for comparison.  Opcodes 3, 4 and 5 are inlined in the
+evaluator now, so their old helpers can't be swapped back in, and the
+difference counts only the conversions fas and hax made.
+
+    python -m bench.bench_to_noun [steps]
+"""
+
+import sys
+import time
+
+from pinochle import nock, parse, to_noun, compile_formula
+
+nock_module = sys.modules['pinochle.nock']
+
+MILLION = 1000000
+
+# opcodes reduced per iteration of the decrement loop: 6 and its test
+# [5 [0 7] 4 0 6] (5), then 9 and its core [0 2] [[4 0 6] 0 7] (7)
+LOOP_OPCODES = 12
+
+DECREMENT = parse('[8 [1 0] 8 [1 6 [5 [0 7] 4 0 6] [0 6] '
+                  '9 2 [0 2] [4 0 6] 0 7] 9 2 0 1]')
+
+def per_million(run, calls: int, repeat: int = 3) -> float:
+    """best seconds run() takes for a million of the calls it makes"""
+
+    run()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best * MILLION / calls
+
+def checked():
+    """bind the evaluator's primitives to versions that convert their
+    arguments, as fas and hax do; returns a function that undoes it"""
+
+    fas, hax = nock_module._fas, nock_module._hax
+    nock_module._fas = lambda x, n: fas(to_noun(x), to_noun(n))
+    nock_module._hax = lambda x, a, b: hax(to_noun(x), to_noun(a),
+                                           to_noun(b))
+    def restore():
+        nock_module._fas, nock_module._hax = fas, hax
+    return restore
+
+if '__main__' == __name__:
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    unfolded = compile_formula(DECREMENT, True, False)
+    run = lambda: nock_module._run(steps, unfolded, None, False)
+    opcodes = steps * LOOP_OPCODES
+    restore = checked()
+    try:
+        before = per_million(run, opcodes)
+    finally:
+        restore()
+    after = per_million(run, opcodes)
+    folded = per_million(lambda: nock(steps, DECREMENT), opcodes)
+    print('checked    %8.3f s per million opcodes (unfolded)' % before)
+    print('unchecked  %8.3f s per million opcodes (unfolded)' % after)
+    print('conversion %8.3f s per million opcodes (%.0f%%)' %
+          (before - after, 100 * (before - after) / before))
+    print('folded     %8.3f s per million opcodes' % folded)
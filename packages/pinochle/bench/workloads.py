@@ -0,0 +1,136 @@
+"""
+The benchmark workloads.
+
+Each workload takes a scale factor and returns the callable to time,
+or a pair (prepare, run): prepare() is called untimed before every
+repetition and run is timed on its result.  Sizes at scale 1 take
+somewhere around a tenth of a second.
+"""
+
+from pinochle import (Cell, nock, parse, pretty, mug, jam, cue, fas,
+                      fas_many, hax_many, clear_formula_cache)
+
+from .bench_cells import build_list, build_tree
+
+WORKLOADS = {}
+
+def workload(name: str):
+    def register(setup):
+        WORKLOADS[name] = setup
+        return setup
+    return register
+
+# *[n DEC] = n - 1, by counting up from 0 in a tail-recursive arm
+DEC = "[8 [1 0] 8 [1 6 [5 [0 7] 4 0 6] [0 6] 9 2 [0 2] [4 0 6] 0 7] 9 2 0 1]"
+# *[[a b] ADD] = a + b
+ADD = "[8 [1 0] 8 [1 6 [5 [0 6] 0 15] [0 14] 9 2 [0 2] [4 0 6] [4 0 14] 0 15] 9 2 0 1]"
+
+# against the core [arm m n]:
+# ?:  =(0 m)  +(n)
+# ?:  =(0 n)  $(m (dec m), n 1)
+# $(m (dec m), n $(n (dec n)))
+ACK = ("[6 [5 [1 0] 0 6] [4 0 7] 6 [5 [1 0] 0 7] "
+       "[9 2 [0 2] [7 [0 6] %(dec)s] 1 1] "
+       "9 2 [0 2] [7 [0 6] %(dec)s] 9 2 [0 2] [0 6] 7 [0 7] %(dec)s]"
+       % {'dec': DEC})
+
+# against the core [arm n]:
+# ?:  (lth n 2)  n  (add $(n (dec n)) $(n (dec (dec n))))
+FIB = ("[6 [5 [1 0] 0 3] [0 3] 6 [5 [1 1] 0 3] [0 3] "
+       "7 [[9 2 [0 2] 7 [0 3] %(dec)s] 9 2 [0 2] 7 [7 [0 3] %(dec)s] %(dec)s] "
+       "%(add)s]" % {'dec': DEC, 'add': ADD})
+
+INVOKE = parse("[9 2 0 1]")
+
+@workload('decrement')
+def decrement(scale: int):
+    n = 30000 * scale
+    formula = parse(DEC)
+    return lambda: nock(n, formula)
+
+@workload('ackermann')
+def ackermann(scale: int):
+    core = Cell(parse(ACK), Cell(3, 2 + scale))
+    return lambda: nock(core, INVOKE)
+
+@workload('fib')
+def fib(scale: int):
+    core = Cell(parse(FIB), 16 + scale)
+    return lambda: nock(core, INVOKE)
+
+@workload('compile')
+def compile_fib(scale: int):
+    formula = parse(FIB)
+    def run():
+        for _ in range(2000 * scale):
+            clear_formula_cache()
+            nock(Cell(formula, 1), INVOKE)
+    return run
+
+@workload('deep-axis')
+def deep_axis(scale: int):
+    # a list of 1000 atoms; axis 2^k - 1 ends at its k-th tail
+    tree = build_list(1000)
+    axes = [(1 << k) - 1 for k in range(1, 1000, 7)]
+    formula = parse("[0 %d]" % axes[-1])
+    def run():
+        for _ in range(10 * scale):
+            for axis in axes:
+                fas(axis, tree)
+            fas_many(axes, tree)
+            nock(tree, formula)
+    return run
+
+@workload('edit')
+def edit(scale: int):
+    # opcode 10 in a loop: *[[i n] LOOP] counts i up to n, editing
+    # the count in the core each time
+    loop = parse("[8 [1 6 [5 [0 6] 0 7] [0 6] 9 2 10 [6 4 0 6] 0 1] "
+                 "9 2 0 1]")
+    n = 20000 * scale
+    tree = build_tree(12)
+    edits = [(axis, axis) for axis in range(4096, 8192, 3)]
+    def run():
+        nock(Cell(0, n), loop)
+        for _ in range(5 * scale):
+            hax_many(edits, tree)
+    return run
+
+def big_noun(scale: int):
+    """a long list of [i tree], so the noun is both long and bushy"""
+
+    tree = build_tree(8)
+    x = 0
+    for i in range(20000 * scale):
+        x = Cell(Cell(i, tree), x)
+    return x
+
+@workload('jam')
+def jam_big(scale: int):
+    n = big_noun(scale)
+    return lambda: jam(n)
+
+@workload('cue')
+def cue_big(scale: int):
+    jammed = jam(big_noun(scale))
+    return lambda: cue(jammed)
+
+@workload('mug')
+def mug_big(scale: int):
+    # fresh cells each time, whose mugs aren't yet computed
+    return (lambda: Cell(build_tree(15 + scale), build_list(100000 * scale)),
+            mug)
+
+@workload('parse')
+def parse_big(scale: int):
+    text = str(build_tree(14 + scale)) + ' ' + str(build_list(50000 * scale))
+    return lambda: parse(text)
+
+@workload('pretty')
+def pretty_big(scale: int):
+    n = Cell(build_tree(14 + scale), build_list(50000 * scale))
+    return lambda: pretty(n, False)
+
+@workload('cells')
+def cells(scale: int):
+    return lambda: build_list(300000 * scale)
@@ -4,6 +4,12 @@ Pinochle - Python implementation of the Nock 4K Combinator Calculus
 
 from .nock import (
     nock,
+    compile_formula,
+    clear_formula_cache,
+    set_formula_cache_size,
+    clear_memo_cache,
+    set_memo_cache_size,
+    memo_stats,
     to_noun,
     isatom,
     iscell,
@@ -13,19 +19,43 @@ from .nock import (
     lus,
     tis,
     fas,
+    fas_many,
     hax,
+    hax_many,
     tru,
     bad,
 )
 from .noun import (
     Cell,
+    HashCons,
+    set_unify,
     deep,
     parse,
     noun,
     pretty,
+    pretty_chunks,
+    pretty_into,
     mug,
     jam,
+    jam_bytes,
+    jam_into,
     cue,
+    cue_buffer,
+    jam_to_file,
+    cue_from_file,
+)
+from .profile import Profile
+from .budget import Budget, OutOfBudget
+from .batch import nock_many, nock_map, Crash
+from .jets import (
+    cord,
+    register_jet,
+    register_mug_jet,
+    declare_jet,
+    unregister_jet,
+    clear_jets,
+    check_jets,
+    find_jet,
 )
 
 # Convenience alias
@@ -34,6 +64,12 @@ parse_noun = parse
 __version__ = '1.2.1'
 __all__ = [
     'nock',
+    'compile_formula',
+    'clear_formula_cache',
+    'set_formula_cache_size',
+    'clear_memo_cache',
+    'set_memo_cache_size',
+    'memo_stats',
     'to_noun',
     'isatom',
     'iscell', 
@@ -43,16 +79,41 @@ __all__ = [
     'lus',
     'tis',
     'fas',
+    'fas_many',
     'hax',
+    'hax_many',
     'tru',
     'bad',
     'Cell',
+    'HashCons',
+    'set_unify',
     'deep',
     'parse',
     'parse_noun',
     'noun',
     'pretty',
+    'pretty_chunks',
+    'pretty_into',
     'mug',
     'jam',
+    'jam_bytes',
+    'jam_into',
     'cue',
+    'cue_buffer',
+    'jam_to_file',
+    'cue_from_file',
+    'cord',
+    'register_jet',
+    'register_mug_jet',
+    'declare_jet',
+    'unregister_jet',
+    'clear_jets',
+    'check_jets',
+    'find_jet',
+    'Profile',
+    'Budget',
+    'OutOfBudget',
+    'nock_many',
+    'nock_map',
+    'Crash',
 ]
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Batch evaluation across a pool of processes.
+
+nock_many runs one formula against many subjects, and nock_map runs
+many [subject formula] pairs; both spread the work over processes, so
+a batch isn't held to one CPU by the GIL:
+
+    >>> from pinochle import parse
+    >>> list(nock_many([1, 2, 3], parse('[4 0 1]'), processes=2))
+    [2, 3, 4]
+
+Nouns are passed between processes jammed, and the formula of
+nock_many is sent to each process once.  An item that crashes, or runs
+out of its budget, yields a Crash in its place and the batch goes on:
+
+    >>> results = nock_map([(1, parse('[0 1]')), (1, parse('[0 2]'))],
+    ...                    processes=2)
+    >>> [str(r) for r in results]
+    ['1', 'fail: item 1: fail: atom']
+"""
+
+import multiprocessing
+import os
+
+from .noun import jam_bytes, cue
+from .nock import nock, to_noun
+from .budget import Budget
+
+# items sent to a process at a time, when the batch's length is unknown
+CHUNKSIZE = 16
+
+
+class Crash(Exception):
+    """The result of a batch item that failed.  index is its position in
+    the batch, and ename and message describe the exception raised."""
+
+    def __init__(self, index, ename, message):
+        self.index = index
+        self.ename = ename
+        self.message = message
+        super().__init__('fail: item %d: %s' % (index, message))
+
+
+# the formula of a nock_many batch, in each pool process
+_formula = None
+
+def _init(formula):
+    global _formula
+    _formula = None if formula is None else cue(formula)
+
+def _evaluate(item):
+    """evaluate one jammed item in a pool process"""
+
+    index, subject, formula, steps, seconds = item
+    if subject is None:
+        # the item couldn't be sent; formula says why
+        return index, False, formula
+    try:
+        formula = _formula if formula is None else cue(formula)
+        budget = None
+        if steps is not None or seconds is not None:
+            budget = Budget(steps=steps, seconds=seconds)
+        product = nock(cue(subject), formula, budget=budget)
+        return index, True, jam_bytes(product)
+    except Exception as e:
+        return index, False, (type(e).__name__, str(e))
+
+def _batch(items, count, formula, processes, ordered, chunksize, context):
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if chunksize is None:
+        if count is None:
+            chunksize = CHUNKSIZE
+        else:
+            chunksize = max(1, -(-count // (4 * processes)))
+    ctx = multiprocessing.get_context(context)
+    with ctx.Pool(processes, _init, (formula,)) as pool:
+        run = pool.imap if ordered else pool.imap_unordered
+        for index, ok, result in run(_evaluate, items, chunksize):
+            result = cue(result) if ok else Crash(index, *result)
+            yield result if ordered else (index, result)
+
+def nock_many(subjects, formula, processes=None, ordered=True,
+              chunksize=None, steps=None, seconds=None, context=None):
+    """*[subject formula] for each of subjects, evaluated in a pool of
+    processes (by default one per CPU).
+
+    returns an iterator over the products in order, or if ordered is
+    false over (index, product) pairs as they complete.  an item that
+    fails gives a Crash instead of a product.  steps and seconds, if
+    given, bound each item as a Budget would.  chunksize is how many
+    items a process takes at a time, and context names the
+    multiprocessing start method.  the pool lasts as long as the
+    iterator.
+    """
+
+    items = _items(((s, None) for s in subjects), steps, seconds)
+    return _batch(items, _len(subjects), jam_bytes(to_noun(formula)),
+                  processes, ordered, chunksize, context)
+
+def nock_map(pairs, processes=None, ordered=True, chunksize=None,
+             steps=None, seconds=None, context=None):
+    """*[subject formula] for each (subject, formula) of pairs, evaluated
+    in a pool of processes.  the results are given as by nock_many."""
+
+    items = _items(pairs, steps, seconds)
+    return _batch(items, _len(pairs), None, processes, ordered, chunksize,
+                  context)
+
+def _items(pairs, steps, seconds):
+    """jam (subject, formula or None) pairs.  an item that can't be
+    jammed is sent without a subject, and the reason in place of its
+    formula, so it crashes alone."""
+
+    for index, pair in enumerate(pairs):
+        try:
+            subject, formula = pair
+            subject = jam_bytes(to_noun(subject))
+            if formula is not None:
+                formula = jam_bytes(to_noun(formula))
+        except Exception as e:
+            subject, formula = None, (type(e).__name__, str(e))
+        yield index, subject, formula, steps, seconds
+
+def _len(items):
+    try:
+        return len(items)
+    except TypeError:
+        return None
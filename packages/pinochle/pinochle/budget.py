@@ -0,0 +1,87 @@
+"""
+Bounded evaluation: step limits, deadlines and cancellation.
+
+Pass a Budget to nock() to stop a run that goes on too long:
+
+    >>> from pinochle import nock, parse
+    >>> loop = parse('[8 [1 9 2 0 1] 9 2 0 1]')    # runs forever
+    >>> try:
+    ...     nock(0, loop, budget=Budget(steps=1000))
+    ... except OutOfBudget as e:
+    ...     print(e.reason, e.steps)
+    steps 1000
+
+The evaluator counts its steps; a formula without opcodes 2 or 9 may be
+folded into a single step, since it can't loop.  The deadline and the
+cancellation token are looked at every CHECK_EVERY steps, so a run
+stops within a few milliseconds of either.
+"""
+
+import time
+
+# steps between looks at the clock and the token
+CHECK_EVERY = 1024
+
+
+class OutOfBudget(Exception):
+    """A run used up its budget.  reason is 'steps', 'deadline' or
+    'cancelled', and steps is how many steps the budget had been
+    charged."""
+
+    def __init__(self, reason, steps):
+        self.reason = reason
+        self.steps = steps
+        super().__init__('out of budget (%s) after %d steps' % (reason, steps))
+
+
+class Budget:
+    """Limits on one or more nock() runs.
+
+    steps caps the evaluator steps charged to this budget, across every
+    run it is passed to.  seconds sets a deadline that many seconds from
+    now; deadline gives one directly, as a time.monotonic() value.
+    token is a threading.Event, or anything with is_set(): setting it
+    cancels the runs using this budget, from any thread.
+    """
+
+    def __init__(self, steps=None, seconds=None, deadline=None, token=None):
+        self.limit = float('inf') if steps is None else steps
+        if seconds is not None:
+            deadline = time.monotonic() + seconds
+        self.deadline = deadline
+        self.token = token
+        self.used = 0
+
+    @property
+    def remaining(self):
+        """steps left, or None if unlimited"""
+
+        if self.limit == float('inf'):
+            return None
+        return max(self.limit - self.used, 0)
+
+    def check(self):
+        """raise OutOfBudget if the deadline has passed or the token is set"""
+
+        if self.token is not None and self.token.is_set():
+            raise OutOfBudget('cancelled', self.used)
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise OutOfBudget('deadline', self.used)
+
+    # called by the evaluator
+
+    def start(self, formula):
+        self.check()
+
+    def stop(self):
+        pass
+
+    def enter(self, formula):
+        pass
+
+    def step(self, op, node, depth):
+        if self.used >= self.limit:
+            raise OutOfBudget('steps', self.used)
+        self.used += 1
+        if not self.used % CHECK_EVERY:
+            self.check()
@@ -0,0 +1,125 @@
+"""
+Bounded caches for the interpreter.
+"""
+
+from collections import OrderedDict
+
+
+class LRU:
+    """A mapping of at most maxsize entries that forgets the least
+    recently used one first.
+
+    >>> c = LRU(2)
+    >>> c.put('a', 1); c.put('b', 2)
+    >>> c.get('a')
+    1
+    >>> c.put('c', 3)
+    >>> c.get('b') is None
+    True
+    >>> len(c)
+    2
+    >>> c.stats()
+    {'hits': 1, 'misses': 1, 'size': 2, 'maxsize': 2}
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        data = self.data
+        try:
+            value = data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        data = self.data
+        data[key] = value
+        data.move_to_end(key)
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def resize(self, maxsize):
+        """change the bound, evicting old entries as needed"""
+
+        self.maxsize = maxsize
+        data = self.data
+        while len(data) > maxsize:
+            data.popitem(last=False)
+
+    def clear(self):
+        """drop every entry and reset the counters"""
+
+        self.data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self.data), 'maxsize': self.maxsize}
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+
+class WeightedLRU(LRU):
+    """An LRU bounded by the total weight of its keys rather than by
+    their number: weigh(key) gives a key's weight, and entries heavier
+    than maxsize on their own aren't kept.
+
+    >>> c = WeightedLRU(10, len)
+    >>> c.put('abcd', 1); c.put('efgh', 2); c.put('ij', 3)
+    >>> c.weight
+    10
+    >>> c.put('klm', 4)
+    >>> 'abcd' in c, c.weight
+    (False, 9)
+    >>> c.put('nopqrstuvwxyz', 5)
+    >>> 'nopqrstuvwxyz' in c
+    False
+    """
+
+    def __init__(self, maxsize, weigh):
+        super().__init__(maxsize)
+        self.weigh = weigh
+        self.weight = 0
+
+    def put(self, key, value):
+        data = self.data
+        if key in data:
+            self.weight -= self.weigh(key)
+        data[key] = value
+        data.move_to_end(key)
+        self.weight += self.weigh(key)
+        self._evict()
+
+    def _evict(self):
+        data = self.data
+        while self.weight > self.maxsize:
+            key, _ = data.popitem(last=False)
+            self.weight -= self.weigh(key)
+
+    def resize(self, maxsize):
+        """change the bound, evicting old entries as needed"""
+
+        self.maxsize = maxsize
+        self._evict()
+
+    def clear(self):
+        """drop every entry and reset the counters"""
+
+        super().clear()
+        self.weight = 0
+
+    def stats(self):
+        return dict(super().stats(), weight=self.weight)
@@ -0,0 +1,312 @@
+"""
+Jets: native Python implementations of hot Nock formulas.
+
+A jet pairs a formula with a Python callable that computes the same
+product.  When the interpreter is about to run a formula that matches a
+registered jet, it calls the jet on the subject instead.  Formulas are
+matched by structure, by mug, or bound at runtime by an opcode 11
+``%fast`` hint naming a declared jet.
+
+A jet receives the subject (for a gate, the whole core) and returns the
+product, or None to punt back to ordinary evaluation.  Jets registered
+with ``check=True``, or all jets after ``check_jets()``, are run and
+then compared against the real evaluation.
+"""
+
+from .noun import Cell, deep, noun, mug
+
+
+class Jet:
+    """A registered native implementation of a formula.
+
+    >>> j = Jet(lambda core: 0, 'zero')
+    >>> j.name, j.check
+    ('zero', False)
+    """
+
+    def __init__(self, fn, name=None, check=False, arm=2):
+        self.fn = fn
+        self.name = name if name is not None else getattr(fn, '__name__', None)
+        self.check = check
+        self.arm = arm
+
+
+# formula -> Jet, matched structurally (hash is the mug)
+_registry = {}
+# mug -> Jet, matched by the formula's mug alone
+_mug_registry = {}
+# cord -> Jet, bound to a core's arm when a %fast hint names it
+_declared = {}
+# compare every jet against the real evaluation
+_checking = False
+
+
+def cord(s: str) -> int:
+    """the atom for a Hoon cord (little-endian UTF-8 text)
+
+    >>> cord('dec')
+    6514020
+    >>> cord('')
+    0
+    """
+
+    return int.from_bytes(s.encode('utf-8'), 'little')
+
+
+FAST = cord('fast')
+
+
+def _fas(x: int, n: noun):
+    """walk axis x in n, or None if it runs off an atom"""
+
+    for bit in bin(x)[3:]:
+        if not deep(n):
+            return None
+        n = n.tail if bit == '1' else n.head
+    return n
+
+
+def register_jet(formula: noun, fn, name=None, check=False) -> Jet:
+    """jet formula (matched by structure) with fn
+
+    >>> j = register_jet(Cell(0, 1), lambda s: s, 'ident')
+    >>> find_jet(Cell(0, 1)) is j
+    True
+    >>> unregister_jet(Cell(0, 1))
+    """
+
+    jet = Jet(fn, name, check)
+    _registry[formula] = jet
+    return jet
+
+
+def register_mug_jet(formula_mug: int, fn, name=None, check=False) -> Jet:
+    """jet any formula whose mug is formula_mug with fn
+
+    >>> j = register_mug_jet(mug(Cell(0, 1)), lambda s: s)
+    >>> find_jet(Cell(0, 1)) is j
+    True
+    >>> clear_jets()
+    """
+
+    jet = Jet(fn, name, check)
+    _mug_registry[formula_mug] = jet
+    return jet
+
+
+def declare_jet(name, fn, arm=2, check=False) -> Jet:
+    """make fn available to %fast hints that name it
+
+    When a ``[11 [%fast clue] d]`` hint whose clue starts with name
+    produces a core, the formula at axis arm of that core is jetted
+    with fn.  name is a cord atom or a str.
+    """
+
+    if isinstance(name, str):
+        name = cord(name)
+    jet = Jet(fn, None, check, arm)
+    _declared[name] = jet
+    return jet
+
+
+def unregister_jet(formula: noun):
+    """remove the structural jet for formula, if any"""
+
+    _registry.pop(formula, None)
+
+
+def clear_jets():
+    """drop every formula and mug binding; declarations are kept"""
+
+    _registry.clear()
+    _mug_registry.clear()
+
+
+def check_jets(enabled=True):
+    """check every jet against the real evaluation (slow; for testing)"""
+
+    global _checking
+    _checking = enabled
+
+
+def find_jet(formula: noun):
+    """the jet for formula, or None"""
+
+    if _registry:
+        jet = _registry.get(formula)
+        if jet is not None:
+            return jet
+    if _mug_registry:
+        return _mug_registry.get(mug(formula))
+    return None
+
+
+def bind_fast(clue: noun, core: noun):
+    """act on a %fast hint: jet the named arm of core, if declared
+
+    The clue is ``chum`` or ``[chum parent hooks]``, where chum is a
+    name or ``[name version]``.
+    """
+
+    chum = clue.head if deep(clue) else clue
+    if deep(chum):
+        chum = chum.head
+    if deep(chum):
+        return
+    jet = _declared.get(chum)
+    if jet is None:
+        return
+    arm = _fas(jet.arm, core)
+    if arm is not None and deep(arm):
+        _registry[arm] = jet
+
+
+# Shipped jets for standard library gates.  Each takes the gate core
+# [battery sample context]; a one-argument sample sits at axis 6 and
+# [a b] samples at axes 12 and 13.  Inputs the real gate would crash or
+# loop on are punted (None) so evaluation stays faithful.
+
+def _one(core):
+    a = _fas(6, core)
+    if a is None or deep(a):
+        return None
+    return a
+
+def _two(core):
+    s = _fas(6, core)
+    if s is None or not deep(s) or deep(s.head) or deep(s.tail):
+        return None, None
+    return s.head, s.tail
+
+def _loob(b: bool):
+    return 0 if b else 1
+
+def dec(core):
+    a = _one(core)
+    if a is None or a == 0:
+        return None
+    return a - 1
+
+def add(core):
+    a, b = _two(core)
+    if a is None:
+        return None
+    return a + b
+
+def sub(core):
+    a, b = _two(core)
+    if a is None or b > a:
+        return None
+    return a - b
+
+def mul(core):
+    a, b = _two(core)
+    if a is None:
+        return None
+    return a * b
+
+def div(core):
+    a, b = _two(core)
+    if a is None or b == 0:
+        return None
+    return a // b
+
+def mod(core):
+    a, b = _two(core)
+    if a is None or b == 0:
+        return None
+    return a % b
+
+def lth(core):
+    a, b = _two(core)
+    if a is None:
+        return None
+    return _loob(a < b)
+
+def lte(core):
+    a, b = _two(core)
+    if a is None:
+        return None
+    return _loob(a <= b)
+
+def gth(core):
+    a, b = _two(core)
+    if a is None:
+        return None
+    return _loob(a > b)
+
+def gte(core):
+    a, b = _two(core)
+    if a is None:
+        return None
+    return _loob(a >= b)
+
+def _max(core):
+    a, b = _two(core)
+    if a is None:
+        return None
+    return a if a > b else b
+
+def _min(core):
+    a, b = _two(core)
+    if a is None:
+        return None
+    return a if a < b else b
+
+def bex(core):
+    a = _one(core)
+    if a is None:
+        return None
+    return 1 << a
+
+def con(core):
+    a, b = _two(core)
+    if a is None:
+        return None
+    return a | b
+
+def dis(core):
+    a, b = _two(core)
+    if a is None:
+        return None
+    return a & b
+
+def mix(core):
+    a, b = _two(core)
+    if a is None:
+        return None
+    return a ^ b
+
+def cap(core):
+    """head of an axis: 2 or 3"""
+    a = _one(core)
+    if a is None or a < 2:
+        return None
+    return 2 | ((a >> (a.bit_length() - 2)) & 1)
+
+def mas(core):
+    """axis within the head or tail"""
+    a = _one(core)
+    if a is None or a < 2:
+        return None
+    top = 1 << (a.bit_length() - 1)
+    return (a & ~(top | (top >> 1))) | (top >> 1)
+
+def peg(core):
+    """axis b within axis a"""
+    a, b = _two(core)
+    if a is None or a == 0 or b == 0:
+        return None
+    shift = b.bit_length() - 1
+    return (a << shift) | (b & ((1 << shift) - 1))
+
+
+STDLIB = {
+    'dec': dec, 'add': add, 'sub': sub, 'mul': mul, 'div': div,
+    'mod': mod, 'lth': lth, 'lte': lte, 'gth': gth, 'gte': gte,
+    'max': _max, 'min': _min, 'bex': bex, 'con': con, 'dis': dis,
+    'mix': mix, 'cap': cap, 'mas': mas, 'peg': peg,
+}
+
+for _name, _fn in STDLIB.items():
+    declare_jet(_name, _fn)
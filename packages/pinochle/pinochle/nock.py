@@ -1,18 +1,12 @@
 from .noun import Cell, deep, parse, noun, pretty
+from .cache import LRU
+from . import jets as _jets
 
 # Constants as nouns
 tru = 0
 bad = 1
 
 
-def deep_copy_noun(n: noun) -> noun:
-    """Deep copy a noun to avoid aliasing issues"""
-    if not deep(n):
-        return n  # Atoms are immutable, no need to copy
-    else:
-        # Recursively copy cells
-        return Cell(deep_copy_noun(n.head), deep_copy_noun(n.tail))
-    
 def to_noun(n) -> noun:
     """Convert Python values to nouns using pynoun's representation"""
     if isinstance(n, noun):
@@ -82,177 +76,704 @@ def tis(a, b) -> noun:
 # /[(a + a + 1) b]    /[3 /[a b]]
 # /a                  /a
 def fas(x, n: noun) -> noun:
-    x = to_noun(x)
-    n = to_noun(n)
-    
+    """resolve axis x in n.  the bits of x below its leading 1, read
+    from the top, are the path: 0 for head, 1 for tail.
+
+    >>> fas(6, Cell(1, Cell(2, 3)))
+    2
+    """
+    return _fas(to_noun(x), to_noun(n))
+
+# The interpreter only ever holds nouns, so it calls these unchecked
+# forms directly; the public helpers convert their arguments first.
+def _fas(x: noun, n: noun) -> noun:
     if deep(x):
         raise Exception("fas: first argument must be atom")
-    
     if x == 0:
         raise Exception("fail")
-    elif x == 1:
-        return n
-    elif x == 2:
-        return head(n)
-    elif x == 3:
-        return tail(n)
-    else:
-        if x % 2 == 0:
-            return fas(2, fas(x // 2, n))
-        else:
-            return fas(3, fas(x // 2, n))
+
+    for step in bin(x)[3:]:
+        if not deep(n):
+            raise Exception("fail: atom")
+        n = n.tail if step == '1' else n.head
+    return n
+
+def fas_many(axes, n: noun) -> list:
+    """resolve several axes in n, in one traversal that walks each
+    shared path prefix once.  products come back in the order given.
+
+    >>> fas_many([7, 2, 6], Cell(1, Cell(2, 3)))
+    [3, 1, 2]
+    """
+    n = to_noun(n)
+    paths = []
+    for i, x in enumerate(axes):
+        x = to_noun(x)
+        if deep(x):
+            raise Exception("fas: first argument must be atom")
+        if x == 0:
+            raise Exception("fail")
+        paths.append((bin(x)[3:], i))
+    paths.sort()
+
+    products = [None] * len(paths)
+    trail = [n]   # trail[k] is the noun k steps down the last path
+    last = ''
+    for path, i in paths:
+        # keep the part of the trail this path shares with the last one
+        shared = 0
+        limit = min(len(path), len(last), len(trail) - 1)
+        while shared < limit and path[shared] == last[shared]:
+            shared += 1
+        del trail[shared + 1:]
+        node = trail[shared]
+        for step in path[shared:]:
+            if not deep(node):
+                raise Exception("fail: atom")
+            node = node.tail if step == '1' else node.head
+            trail.append(node)
+        products[i] = node
+        last = path
+    return products
 
 # #[1 a b]            a
 # #[(a + a) b c]      #[a [b /[(a + a + 1) c]] c]
 # #[(a + a + 1) b c]  #[a [/[(a + a) c] b] c]
 # #a                  #a
 def hax(x: noun, a: noun, b: noun) -> noun:
-    x = to_noun(x)
-    a = to_noun(a)
-    b = to_noun(b)
-    
+    """replace axis x of b with a.  walks down once, then rebuilds only
+    the cells on the path, reusing every sibling subtree.
+
+    >>> str(hax(6, 9, Cell(1, Cell(2, 3))))
+    '[1 9 3]'
+    """
+    return _hax(to_noun(x), to_noun(a), to_noun(b))
+
+def _hax(x: noun, a: noun, b: noun) -> noun:
     if deep(x):
         raise Exception("fail: x must be atom")
-    
-    if x == 1:
-        return a
-    elif x % 2 == 0:
-        new_axis = x // 2
-        new_a = Cell(a, fas(x + 1, b))
-        return hax(new_axis, new_a, b)
-    else:
-        new_axis = x // 2
-        new_a = Cell(fas(x - 1, b), a)
-        return hax(new_axis, new_a, b)
+    if x == 0:
+        raise Exception("fail")
 
-def nock(a, formula):
-    """The Nock virtual machine interpreter"""
-    a = to_noun(a)
+    path = bin(x)[3:]
+    spine = []
+    n = b
+    for step in path:
+        if not deep(n):
+            raise Exception("fail: atom")
+        spine.append(n)
+        n = n.tail if step == '1' else n.head
+
+    for i in range(len(path) - 1, -1, -1):
+        parent = spine[i]
+        if path[i] == '1':
+            a = Cell(parent.head, a)
+        else:
+            a = Cell(a, parent.tail)
+    return a
+
+_UNSET = object()
+
+def hax_many(edits, b: noun) -> noun:
+    """apply several (axis, value) edits to b, with the same result as
+    applying them with hax one after another, crashes included.  paths
+    are merged into a trie first, so each new cell on a shared prefix is
+    built only once.  with no edits, b itself is returned.
+
+    >>> str(hax_many([(4, 9), (5, 8), (7, 0)], Cell(Cell(1, 2), Cell(3, 4))))
+    '[[9 8] 3 0]'
+    >>> hax_many([(6, 9), (3, 5)], Cell(1, 2))
+    Traceback (most recent call last):
+    ...
+    Exception: fail: atom
+    """
+    b = to_noun(b)
+
+    # trie node: [head child, tail child, replacement or _UNSET]
+    root = [None, None, _UNSET]
+    for x, a in edits:
+        x = to_noun(x)
+        a = to_noun(a)
+        if deep(x):
+            raise Exception("fail: x must be atom")
+        if x == 0:
+            raise Exception("fail")
+        path = bin(x)[3:]
+        node = root
+        n = b  # the subtree at node, which earlier edits only changed below
+        for i, step in enumerate(path):
+            if node[2] is not _UNSET:
+                # an earlier edit replaced an ancestor: edit its value
+                node[2] = _hax(int('1' + path[i:], 2), a, node[2])
+                break
+            if not deep(n):
+                raise Exception("fail: atom")
+            side = 1 if step == '1' else 0
+            n = n.tail if side else n.head
+            if node[side] is None:
+                node[side] = [None, None, _UNSET]
+            node = node[side]
+        else:
+            # replacing this subtree drops any edits made inside it
+            node[0] = node[1] = None
+            node[2] = a
+
+    if root[2] is not _UNSET:
+        return root[2]
+    if root[0] is None and root[1] is None:
+        return b
+
+    products = []
+    stack = [(root, b, False)]
+    while stack:
+        node, n, ready = stack.pop()
+        if node[2] is not _UNSET:
+            products.append(node[2])
+        elif not ready:
+            if not deep(n):
+                raise Exception("fail: atom")
+            stack.append((node, n, True))
+            if node[1] is not None:
+                stack.append((node[1], n.tail, False))
+            if node[0] is not None:
+                stack.append((node[0], n.head, False))
+        else:
+            t = products.pop() if node[1] is not None else n.tail
+            h = products.pop() if node[0] is not None else n.head
+            products.append(Cell(h, t))
+    return products[0]
+
+# Compiled formulas.  compile_formula() decodes a formula once into a
+# tree of nodes: tuples whose first element is the opcode (0-11), _CONS
+# for a cell of formulas, or _PURE.  A _PURE node wraps a closure that
+# computes the product directly from the subject; formulas that can't
+# loop (no opcode 2, 9 or side-effecting hint) and aren't too deep
+# become closures, and everything else stays a node for the evaluator's
+# explicit stack.
+_CONS = 12         # (_CONS, head, tail)
+_PURE = 13         # (_PURE, fn, depth)
+
+# Closures call their children on the Python stack, so only formulas
+# shallower than this are folded into a single closure.
+_MAX_PURE_DEPTH = 64
+
+_compiled = LRU(4096)      # formula -> node, by mug and structure
+_compiled_ids = LRU(4096)  # id(formula) -> (formula, node)
+_unfolded = LRU(4096)      # formula -> node without closures
+
+# Dynamic hints the evaluator acts on; others are computed and dropped.
+MEMO = _jets.cord('memo')
+
+_memo = LRU(4096)          # [subject formula] -> product, for %memo
+
+def _if_crash(test):
+    """crash as *[a 6 b c d] does when b is not a loobean: +test fails
+    on a cell, and /[test+2 [2 3]] runs off an atom otherwise"""
+
+    if deep(test):
+        raise Exception("fail: cell")
+    raise Exception("fail: atom")
+
+def _crash(message):
+    def run(s):
+        raise Exception(message)
+    return (_PURE, run, 1)
+
+def _decode(f):
+    """split a formula into (opcode, static arguments, subformulas),
+    or a crash node if it is malformed"""
+
+    if not deep(f):
+        return _crash("crash: invalid formula (atom)")
+    op = f.head
+    t = f.tail
+    if deep(op):
+        return (_CONS, (), (op, t))
+    if op == 0 or op == 1:
+        return (op, (t,), ())
+    if op == 3 or op == 4:
+        return (op, (), (t,))
+    if op > 11:
+        return _crash(f"Unknown opcode: {op}")
+    if not deep(t):
+        return _crash("fail: atom")
+    if op == 6:
+        if not deep(t.tail):
+            return _crash("fail: atom")
+        return (6, (), (t.head, t.tail.head, t.tail.tail))
+    if op == 9:
+        return (9, (t.head,), (t.tail,))
+    if op == 10:
+        if not deep(t.head):
+            return _crash("Opcode 10 requires [b c] as first argument")
+        return (10, (t.head.head,), (t.head.tail, t.tail))
+    if op == 11:
+        if deep(t.head):
+            # keep the hinted formula itself for %memo keys
+            return (11, (t.head.head, t.tail), (t.head.tail, t.tail))
+        # static hint: *[a 11 b c] = *[a c]
+        return (11, None, (t.tail,))
+    return (op, (), (t.head, t.tail))
+
+def _pure_fn(op, args, kids):
+    """the closure for a formula whose subformulas are all closures"""
+
+    fns = [k[1] for k in kids]
+    if op == 0:
+        axis = args[0]
+        if axis == 1:
+            return lambda s: s
+        if deep(axis) or axis == 0:
+            return lambda s: _fas(axis, s)
+        path = bin(axis)[3:]
+        def run(s):
+            for step in path:
+                if not deep(s):
+                    raise Exception("fail: atom")
+                s = s.tail if step == '1' else s.head
+            return s
+        return run
+    elif op == 1:
+        constant = args[0]
+        return lambda s: constant
+    elif op == _CONS:
+        h, t = fns
+        return lambda s: Cell(h(s), t(s))
+    elif op == 3:
+        b, = fns
+        return lambda s: 0 if deep(b(s)) else 1
+    elif op == 4:
+        b, = fns
+        def run(s):
+            n = b(s)
+            if deep(n):
+                raise Exception("fail: cell")
+            return n + 1
+        return run
+    elif op == 5:
+        b, c = fns
+        def run(s):
+            left = b(s)
+            return 0 if left == c(s) else 1
+        return run
+    elif op == 6:
+        b, c, d = fns
+        def run(s):
+            test = b(s)
+            if test == 0:
+                return c(s)
+            if test == 1:
+                return d(s)
+            _if_crash(test)
+        return run
+    elif op == 7:
+        b, c = fns
+        return lambda s: c(b(s))
+    elif op == 8:
+        b, c = fns
+        return lambda s: c(Cell(b(s), s))
+    elif op == 10:
+        axis = args[0]
+        c, d = fns
+        def run(s):
+            value = c(s)
+            return _hax(axis, value, d(s))
+        return run
+    elif op == 11:
+        c, d = fns
+        def run(s):
+            c(s)
+            return d(s)
+        return run
+
+def _build(decoded, kids, fold=True):
+    op, args, _ = decoded
+    if op == 11 and args is None:
+        return kids[0]
+    depth = 1
+    for k in kids:
+        if k[0] != _PURE:
+            depth = None
+            break
+        if k[2] >= depth:
+            depth = k[2] + 1
+    if fold and depth is not None and depth <= _MAX_PURE_DEPTH \
+            and op != 2 and op != 9 \
+            and not (op == 11 and (args[0] == _jets.FAST or
+                                   args[0] == MEMO)):
+        return (_PURE, _pure_fn(op, args, kids), depth)
+    return (op,) + tuple(args) + tuple(kids)
+
+def _compile(formula, fold=True):
+    """compile formula to a node, bottom-up without recursion"""
+
+    done = {}  # id(subformula) -> node
+    work = [(formula, None)]
+    while work:
+        f, decoded = work.pop()
+        if decoded is None:
+            if id(f) in done:
+                continue
+            decoded = _decode(f)
+            if decoded[0] == _PURE:
+                done[id(f)] = decoded
+                continue
+            work.append((f, decoded))
+            for k in decoded[2]:
+                if id(k) not in done:
+                    work.append((k, None))
+        else:
+            done[id(f)] = _build(decoded, [done[id(k)] for k in decoded[2]],
+                                 fold)
+    return done[id(formula)]
+
+def compile_formula(formula: noun, structural=True, fold=True):
+    """compile a formula for the evaluator, caching the result.
+
+    Lookups try the formula's identity first, then (if structural) its
+    mug and structure.  Both caches are bounded.  With fold=False no
+    closures are made, so the evaluator takes one step per opcode (as
+    profiled runs need); those nodes are cached by structure apart.
+
+    >>> compile_formula(Cell(0, 1))[0] == _PURE
+    True
+    >>> compile_formula(Cell(0, 1)) is compile_formula(Cell(0, 1))
+    True
+    """
+
+    if not fold:
+        node = _unfolded.get(formula)
+        if node is None:
+            node = _compile(formula, False)
+            _unfolded.put(formula, node)
+        return node
+    hit = _compiled_ids.get(id(formula))
+    if hit is not None and hit[0] is formula:
+        return hit[1]
+    node = _compiled.get(formula) if structural else None
+    if node is None:
+        node = _compile(formula)
+        if structural:
+            _compiled.put(formula, node)
+    _compiled_ids.put(id(formula), (formula, node))
+    return node
+
+def clear_memo_cache():
+    """forget every %memo result and reset the hit counters"""
+
+    _memo.clear()
+
+def set_memo_cache_size(maxsize: int):
+    """bound the number of %memo results kept (least recent go first)"""
+
+    _memo.resize(maxsize)
+
+def memo_stats():
+    """hits, misses, size and maxsize of the %memo cache"""
+
+    return _memo.stats()
+
+def clear_formula_cache():
+    """forget every compiled formula"""
+
+    _compiled.clear()
+    _compiled_ids.clear()
+    _unfolded.clear()
+
+def set_formula_cache_size(maxsize: int):
+    """bound the number of compiled formulas kept"""
+
+    _compiled.resize(maxsize)
+    _compiled_ids.resize(maxsize)
+    _unfolded.resize(maxsize)
+
+# Continuation frames for the evaluator's explicit stack.  Each frame is a
+# tuple whose first element is one of these tags; the remaining elements
+# are whatever the continuation needs once the pending product arrives.
+# b, c and d below are compiled nodes, except where they are axes.
+_CONS_HEAD = 0     # (tag, subject, d)       *[a [b c] d]: evaluate d next
+_CONS_TAIL = 1     # (tag, head)             build [head product]
+_TWO_SUBJECT = 2   # (tag, subject, c)       *[a 2 b c]: evaluate c next
+_TWO_FORMULA = 3   # (tag, new_subject)      tail call *[new_subject product]
+_WUT = 4           # (tag,)                  ?product
+_LUS = 5           # (tag,)                  +product
+_TIS_LEFT = 6      # (tag, subject, c)       *[a 5 b c]: evaluate c next
+_TIS_RIGHT = 7     # (tag, left)             =[left product]
+_IF = 8            # (tag, subject, c, d)    pick c or d, tail call
+_COMPOSE = 9       # (tag, c)                tail call *[product c]
+_PUSH = 10         # (tag, subject, c)       tail call *[[product subject] c]
+_INVOKE = 11       # (tag, b)                tail call *[product /[b product]]
+_EDIT_VALUE = 12   # (tag, subject, b, d)    *[a 10 [b c] d]: evaluate d next
+_EDIT_TARGET = 13  # (tag, b, value)         #[b value product]
+_HINT = 14         # (tag, subject, b, f, d) drop the clue, tail call *[a d]
+                   #                         (f is d's formula noun)
+_FAST = 15         # (tag, clue)             bind jets named by a %fast hint
+_JET_CHECK = 16    # (tag, jet, native)      compare a jet with the real product
+_MEMO_SAVE = 17    # (tag, key)              remember a %memo product
+
+class _Both:
+    """a profile and a budget watching the same run"""
+
+    def __init__(self, profile, budget):
+        self.profile = profile
+        self.budget = budget
+
+    def start(self, formula):
+        self.budget.start(formula)
+        self.profile.start(formula)
+
+    def stop(self):
+        self.profile.stop()
+        self.budget.stop()
+
+    def enter(self, formula):
+        self.profile.enter(formula)
+
+    def step(self, op, node, depth):
+        self.budget.step(op, node, depth)
+        self.profile.step(op, node, depth)
+
+def nock(a, formula, profile=None, budget=None):
+    """The Nock virtual machine interpreter.
+
+    Evaluation runs on an explicit continuation stack instead of the
+    Python call stack.  The tail positions of opcodes 2, 6, 7, 8, 9 and
+    11 replace the current computation rather than pushing a frame, so
+    tail-recursive formulas (loops) run in constant space, and non-tail
+    nesting is bounded by memory rather than the recursion limit.
+
+    Formulas are compiled once (see compile_formula) and the formulas
+    computed by opcodes 2 and 9 are looked up in the compiled cache.
+
+    The subject and formula are converted with to_noun once, here;
+    evaluation itself trusts that it holds nouns and skips the checks
+    the public helpers (fas, hax, lus, ...) make on every call.
+
+    profile, if given, is a Profile that counts what the run does (see
+    pinochle.profile).  budget, if given, is a Budget that stops the
+    run with OutOfBudget once it has taken too many steps, passed its
+    deadline or been cancelled (see pinochle.budget).
+
+    >>> nock(41, Cell(4, Cell(0, 1)))
+    42
+    """
+    subject = to_noun(a)
     formula = to_noun(formula)
+    if profile is None and budget is None:
+        return _run(subject, compile_formula(formula), None, True)
+    if profile is None:
+        ctl = budget
+    elif budget is None:
+        ctl = profile
+    else:
+        ctl = _Both(profile, budget)
+    # profiles count every opcode, so they need unfolded formulas
+    fold = profile is None
+    ctl.start(formula)
+    try:
+        return _run(subject, compile_formula(formula, True, fold), ctl, fold)
+    finally:
+        ctl.stop()
+
+def _run(subject, node, ctl, fold):
+    """evaluate *[subject node]; ctl, if not None, sees every step and
+    every formula run by opcodes 2 and 9, which are compiled with fold"""
+
+    stack = []
+
+    while True:
+        # Reduce *[subject node] until it yields a product or pushes a
+        # continuation and moves on to a subformula.
+        op = node[0]
+        if ctl is not None:
+            ctl.step(op, node, len(stack))
 
-    if deep(formula):
-        f_head = head(formula)
-        f_tail = tail(formula)
-        
-        # *[a [b c] d]        [*[a b c] *[a d]]
-        if deep(f_head):
-            left = nock(a, f_head)
-            right = nock(a, f_tail)
-            return Cell(left, right)
-        
-        # Head is an atom - it's an opcode
-        if deep(f_head):
-            raise Exception("Opcode must be an atom")
-        
-        opcode = f_head
-        
-        if opcode == 0:
-            # *[a 0 b] = /[b a]
-            b = f_tail
-            return fas(b, a)
-        
-        elif opcode == 1:
-            # *[a 1 b] = b
-            return f_tail
-        
-        elif opcode == 2:
+        if op == _PURE:
+            product = node[1](subject)
+
+        elif op == _CONS:
+            # *[a [b c] d]        [*[a b c] *[a d]]
+            stack.append((_CONS_HEAD, subject, node[2]))
+            node = node[1]
+            continue
+
+        elif op == 2:
             # *[a 2 b c] = *[*[a b] *[a c]]
-            b = head(f_tail)
-            c = tail(f_tail)
-            # Evaluate both against the original subject
-            # Important: evaluate in the correct order
-            new_subject = nock(a, b)
-            new_formula = nock(a, c)
-            return nock(new_subject, new_formula)
-        
-        elif opcode == 3:
+            stack.append((_TWO_SUBJECT, subject, node[2]))
+            node = node[1]
+            continue
+
+        elif op == 3:
             # *[a 3 b] = ?*[a b]
-            b = f_tail
-            result = nock(a, b)
-            return wut(result)
-        
-        elif opcode == 4:
+            stack.append((_WUT,))
+            node = node[1]
+            continue
+
+        elif op == 4:
             # *[a 4 b] = +*[a b]
-            b = f_tail
-            result = nock(a, b)
-            return lus(result)
-        
-        elif opcode == 5:
+            stack.append((_LUS,))
+            node = node[1]
+            continue
+
+        elif op == 5:
             # *[a 5 b c] = =[*[a b] *[a c]]
-            b = head(f_tail)
-            c = tail(f_tail)
-            return tis(nock(a, b), nock(a, c))
-        
-        elif opcode == 6:
+            stack.append((_TIS_LEFT, subject, node[2]))
+            node = node[1]
+            continue
+
+        elif op == 6:
             # *[a 6 b c d] = *[a *[[c d] 0 *[[2 3] 0 *[a 4 4 b]]]]
-            b = head(f_tail)
-            cd_tail = tail(f_tail)
-            c = head(cd_tail)
-            d = tail(cd_tail)
-            
-            inner = nock(a, Cell(4, Cell(4, b)))
-            middle = nock(Cell(2, 3), Cell(0, inner))      # subject: [2 3]
-            outer = nock(Cell(c, d), Cell(0, middle))      # subject: [c d]
-            return nock(a, outer)                           # subject: a, formula: outer
-        
-        elif opcode == 7:
+            # evaluate b once, then c or d in tail position
+            stack.append((_IF, subject, node[2], node[3]))
+            node = node[1]
+            continue
+
+        elif op == 7:
             # *[a 7 b c] = *[*[a b] c]
-            b = head(f_tail)
-            c = tail(f_tail)
-            return nock(nock(a, b), c)
-        
-        elif opcode == 8:
+            stack.append((_COMPOSE, node[2]))
+            node = node[1]
+            continue
+
+        elif op == 8:
             # *[a 8 b c] = *[[*[a b] a] c]
-            b = head(f_tail)
-            c = tail(f_tail)
-            new_subject = Cell(nock(a, b), a)
-            return nock(new_subject, c)
-        
-        elif opcode == 9:
+            stack.append((_PUSH, subject, node[2]))
+            node = node[1]
+            continue
+
+        elif op == 9:
             # *[a 9 b c] = *[*[a c] 2 [0 1] 0 b]
-            b = head(f_tail)
-            c = tail(f_tail)
-            new_subject = nock(a, c)
-            # Build formula: [2 [0 1] 0 b]
-            # With right-branching: [2 [[0 1] [0 b]]]
-            # Deep copy b to prevent aliasing issues
-            b_copy = deep_copy_noun(b)
-            new_formula = Cell(2, Cell(Cell(0, 1), Cell(0, b_copy)))
-            return nock(new_subject, new_formula)
-        
-        elif opcode == 10:
+            stack.append((_INVOKE, node[1]))
+            node = node[2]
+            continue
+
+        elif op == 10:
             # *[a 10 [b c] d] = #[b *[a c] *[a d]]
-            first_arg = head(f_tail)
-            
-            if deep(first_arg):  # [b c] case
-                b = head(first_arg)
-                c = tail(first_arg)
-                d = tail(f_tail)
-                return hax(b, nock(a, c), nock(a, d))
-            else:
-                raise Exception("Opcode 10 requires [b c] as first argument")
-        
-        elif opcode == 11:
-            # *[a 11 [b c] d] = *[[*[a c] *[a d]] 0 3]
-            # *[a 11 b c] = *[a c]
-            first_arg = head(f_tail)
-            
-            if deep(first_arg):  # first_arg is [b c]
-                b = head(first_arg)
-                c = tail(first_arg)
-                d = tail(f_tail)
-                new_subject = Cell(nock(a, c), nock(a, d))
-                return nock(new_subject, Cell(0, 3))
-            else:
-                # *[a 11 b c]
-                c = tail(f_tail)
-                return nock(a, c)
-        
+            stack.append((_EDIT_VALUE, subject, node[1], node[3]))
+            node = node[2]
+            continue
+
+        elif op == 0:
+            # unfolded nodes only: *[a 0 b] = /[b a]
+            product = _fas(node[1], subject)
+
+        elif op == 1:
+            # unfolded nodes only: *[a 1 b] = b
+            product = node[1]
+
         else:
-            raise Exception(f"Unknown opcode: {opcode}")
-    
-    # *a crashes
-    raise Exception("crash: invalid formula (atom)")
+            # *[a 11 [b c] d] = *[[*[a c] *[a d]] 0 3]
+            stack.append((_HINT, subject, node[1], node[2], node[4]))
+            node = node[3]
+            continue
+
+        # Hand the product back to pending continuations until one of
+        # them starts another reduction.
+        while True:
+            if not stack:
+                return product
+
+            frame = stack.pop()
+            tag = frame[0]
+
+            if tag == _TWO_FORMULA or tag == _INVOKE:
+                if tag == _TWO_FORMULA:
+                    subject = frame[1]
+                    formula = product
+                else:
+                    # *[core 2 [0 1] 0 b] = *[core /[b core]]
+                    subject = product
+                    formula = _fas(frame[1], subject)
+                if _jets._registry or _jets._mug_registry:
+                    jet = _jets.find_jet(formula)
+                    if jet is not None:
+                        native = jet.fn(subject)
+                        if native is not None:
+                            if jet.check or _jets._checking:
+                                stack.append((_JET_CHECK, jet, native))
+                            else:
+                                product = native
+                                continue
+                if ctl is None:
+                    node = compile_formula(formula)
+                else:
+                    ctl.enter(formula)
+                    node = compile_formula(formula, True, fold)
+                break
+            elif tag == _CONS_HEAD:
+                stack.append((_CONS_TAIL, product))
+                subject = frame[1]
+                node = frame[2]
+                break
+            elif tag == _CONS_TAIL:
+                product = Cell(frame[1], product)
+            elif tag == _TWO_SUBJECT:
+                stack.append((_TWO_FORMULA, product))
+                subject = frame[1]
+                node = frame[2]
+                break
+            elif tag == _WUT:
+                product = 0 if deep(product) else 1
+            elif tag == _LUS:
+                if deep(product):
+                    raise Exception("fail: cell")
+                product += 1
+            elif tag == _TIS_LEFT:
+                stack.append((_TIS_RIGHT, product))
+                subject = frame[1]
+                node = frame[2]
+                break
+            elif tag == _TIS_RIGHT:
+                product = 0 if frame[1] == product else 1
+            elif tag == _IF:
+                subject = frame[1]
+                if product == 0:
+                    node = frame[2]
+                elif product == 1:
+                    node = frame[3]
+                else:
+                    _if_crash(product)
+                break
+            elif tag == _COMPOSE:
+                subject = product
+                node = frame[1]
+                break
+            elif tag == _PUSH:
+                subject = Cell(product, frame[1])
+                node = frame[2]
+                break
+            elif tag == _EDIT_VALUE:
+                stack.append((_EDIT_TARGET, frame[2], product))
+                subject = frame[1]
+                node = frame[3]
+                break
+            elif tag == _EDIT_TARGET:
+                product = _hax(frame[1], frame[2], product)
+            elif tag == _HINT:
+                # the clue is computed for its effects and discarded,
+                # except by %fast, which names the core d produces
+                subject = frame[1]
+                node = frame[4]
+                hint = frame[2]
+                if hint == MEMO:
+                    key = Cell(subject, frame[3])
+                    memoized = _memo.get(key)
+                    if memoized is not None:
+                        product = memoized
+                        continue
+                    stack.append((_MEMO_SAVE, key))
+                elif hint == _jets.FAST:
+                    stack.append((_FAST, product))
+                break
+            elif tag == _MEMO_SAVE:
+                _memo.put(frame[1], product)
+            elif tag == _FAST:
+                _jets.bind_fast(frame[1], product)
+            elif tag == _JET_CHECK:
+                jet = frame[1]
+                if frame[2] != product:
+                    raise Exception("jet mismatch: %s: jet %s, nock %s" %
+                                    (jet.name, pretty(frame[2], False),
+                                     pretty(product, False)))
 
 # Use pynoun's built-in parser
 parse_noun = parse
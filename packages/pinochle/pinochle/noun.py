@@ -2,9 +2,17 @@
 Urbit nouns with mug, jam, and cue.
 """
 
+import codecs
+import io
+import mmap
+import os
+import re
+
 import mmh3
 from bitstring import BitArray
 
+from .cache import WeightedLRU
+
 def byte_length(i: int):
     """how many bytes to represent i?
 
@@ -41,9 +49,13 @@ def mum(syd: int, fal: int, key: int):
     422532488
     """
 
-    k = intbytes(key)
-    for s in range(syd, syd+8):
-        haz = mmh3.hash(k, seed=s, signed=False)
+    k = key.to_bytes((key.bit_length() + 7) >> 3, 'little')
+    haz = mmh3.hash(k, syd, False)
+    ham = (haz >> 31) ^ (haz & 0x7fffffff)
+    if 0 != ham:
+        return ham
+    for s in range(syd+1, syd+8):
+        haz = mmh3.hash(k, s, False)
         ham = (haz >> 31) ^ (haz & 0x7fffffff)
         if 0 != ham:
             return ham
@@ -67,8 +79,13 @@ class Cell:
     2
     >>> x.tail.tail
     3
+
+    Cells have fixed slots and no instance dict: 56 bytes each on
+    64-bit CPython 3.11, against 96 with a dict.
     """
 
+    __slots__ = ('head', 'tail', 'mug')
+
     def __init__(self, head, tail, mug=0):
         self.head = head
         self.tail = tail
@@ -87,7 +104,7 @@ class Cell:
         """
 
         if 0 == self.mug:
-            self.mug = mug_both(mug(self.head), mug(self.tail))
+            return mug(self)
         return self.mug
 
     def __eq__(self, other):
@@ -105,22 +122,43 @@ class Cell:
         True
         >>> x.mug != 0 and x.mug == y.mug
         True
+
+        Pairs of cells are compared on an explicit stack, so deep nouns
+        don't reach the recursion limit.  Only pairs that have been
+        proven equal are unified, by pointing the right-hand cell at the
+        left-hand cell's children; the structure of both operands stays
+        the same, so shared nouns can't be changed by it.  set_unify()
+        turns unification off.
         """
 
+        if self is other:
+            return True
         if not deep(other):
             return False
-        if self.mug != 0 and other.mug != 0 and self.mug != other.mug:
-            return False
-        if self.head != other.head:
-            return False
-        other.head = self.head
-        if self.tail != other.tail:
-            return False
-        other.tail = self.tail
-        if 0 != self.mug:
-            other.mug = self.mug
-        elif 0 != other.mug:
-            self.mug = other.mug
+        unify = _unify
+        stack = [(self, other, False)]
+        while stack:
+            x, y, proven = stack.pop()
+            if proven:
+                if unify:
+                    y.head = x.head
+                    y.tail = x.tail
+                if 0 != x.mug:
+                    y.mug = x.mug
+                elif 0 != y.mug:
+                    x.mug = y.mug
+                continue
+            if x is y:
+                continue
+            if not deep(x) or not deep(y):
+                if deep(x) or deep(y) or x != y:
+                    return False
+                continue
+            if x.mug != 0 and y.mug != 0 and x.mug != y.mug:
+                return False
+            stack.append((x, y, True))
+            stack.append((x.tail, y.tail, False))
+            stack.append((x.head, y.head, False))
         return True
 
     def pretty(self, tail_pos):
@@ -133,17 +171,98 @@ class Cell:
         '0 0'
         """
 
-        content = '%s %s' % \
-                (pretty(self.head, False), pretty(self.tail, True))
-        if tail_pos:
-            return content
-        return '[%s]' % content
+        return pretty(self, tail_pos)
 
     def __str__(self):
         return self.pretty(False)
 
 noun = int | Cell
 
+# whether equal cells are unified to share storage (see Cell.__eq__)
+_unify = True
+
+def set_unify(enabled: bool):
+    """turn unification in Cell.__eq__ on or off
+
+    >>> set_unify(False)
+    >>> x, y = Cell(Cell(1, 2), 3), Cell(Cell(1, 2), 3)
+    >>> x == y and x.head is not y.head
+    True
+    >>> set_unify(True)
+    """
+
+    global _unify
+    _unify = enabled
+
+class HashCons:
+    """A hash-consing table: cells built or interned through the same
+    table are shared whenever they are structurally equal.
+
+    >>> h = HashCons()
+    >>> x = h.cons(1, h.cons(2, 3))
+    >>> x is h.cons(1, h.cons(2, 3))
+    True
+    >>> y = h.intern(Cell(Cell(2, 3), Cell(2, 3)))
+    >>> y.head is y.tail is x.tail
+    True
+    >>> len(h)
+    3
+    """
+
+    __slots__ = ('table',)
+
+    def __init__(self):
+        # (head key, tail key) -> cell, where an atom keys as itself and
+        # a cell (already in the table) as -1 - id(cell), so the two
+        # can't collide.  The table keeps its cells, and so their ids,
+        # alive.
+        self.table = {}
+
+    def cons(self, head: noun, tail: noun) -> Cell:
+        """the shared cell [head tail]; head and tail must be atoms or
+        cells from this table"""
+
+        key = (-1 - id(head) if isinstance(head, Cell) else head,
+               -1 - id(tail) if isinstance(tail, Cell) else tail)
+        cell = self.table.get(key)
+        if cell is None:
+            cell = Cell(head, tail)
+            self.table[key] = cell
+        return cell
+
+    def intern(self, n: noun) -> noun:
+        """the shared copy of any noun, built bottom-up"""
+
+        if not deep(n):
+            return n
+        done = {}  # id(cell in n) -> shared cell
+        stack = [n]
+        while stack:
+            c = stack[-1]
+            if id(c) in done:
+                stack.pop()
+                continue
+            h = c.head
+            t = c.tail
+            ready = True
+            if deep(t) and id(t) not in done:
+                stack.append(t)
+                ready = False
+            if deep(h) and id(h) not in done:
+                stack.append(h)
+                ready = False
+            if ready:
+                stack.pop()
+                done[id(c)] = self.cons(done[id(h)] if deep(h) else h,
+                                        done[id(t)] if deep(t) else t)
+        return done[id(n)]
+
+    def clear(self):
+        self.table.clear()
+
+    def __len__(self):
+        return len(self.table)
+
 def deep(n: noun):
     """test whether noun is a cell, like nock 3
     
@@ -155,20 +274,158 @@ def deep(n: noun):
     
     return isinstance(n, Cell)
 
+def mug_atom(a: int):
+    """mug for an atom, from a table for small atoms and a bounded
+    cache for big ones
+
+    >>> mug_atom(0) == mum(0xcafebabe, 0x7fff, 0)
+    True
+    >>> mug_atom(1 << 1000) == mum(0xcafebabe, 0x7fff, 1 << 1000)
+    True
+    """
+
+    if a < _SMALL_ATOMS:
+        return _small_mugs[a]
+    if a < _BIG_ATOM:
+        return mum(0xcafebabe, 0x7fff, a)
+    m = _big_mugs.get(a)
+    if m is None:
+        m = mum(0xcafebabe, 0x7fff, a)
+        _big_mugs.put(a, m)
+    return m
+
+# atoms below this have precomputed mugs
+_SMALL_ATOMS = 1 << 10
+_small_mugs = [mum(0xcafebabe, 0x7fff, a) for a in range(_SMALL_ATOMS)]
+
+# atoms of 256 bits or more cache their mugs, up to this many bits of
+# atoms in all, since the cache keeps its atoms alive
+_BIG_ATOM = 1 << 256
+_BIG_MUG_BITS = 1 << 26
+_big_mugs = WeightedLRU(_BIG_MUG_BITS, int.bit_length)
+
 def mug(n: noun):
-    """get the mug for any noun
+    """get the mug for any noun.  cells are hashed bottom-up without
+    recursion, filling in every missing cell mug along the way.
 
     >>> mug(0)
     2046756072
     >>> mug(Cell(0, 0))
     422532488
+    >>> x = 0
+    >>> for i in range(100000): x = Cell(i, x)
+    >>> mug(x) == mug_both(mug(x.head), mug(x.tail))
+    True
+    """
+
+    if not deep(n):
+        return mug_atom(n)
+    if 0 != n.mug:
+        return n.mug
+    stack = [n]
+    while stack:
+        c = stack[-1]
+        if 0 != c.mug:
+            stack.pop()
+            continue
+        h = c.head
+        t = c.tail
+        ready = True
+        if deep(t) and 0 == t.mug:
+            stack.append(t)
+            ready = False
+        if deep(h) and 0 == h.mug:
+            stack.append(h)
+            ready = False
+        if ready:
+            stack.pop()
+            c.mug = mug_both(h.mug if deep(h) else mug_atom(h),
+                             t.mug if deep(t) else mug_atom(t))
+    return n.mug
+
+# pretty-printed text is handed out in pieces of about this many
+# characters
+_PRETTY_CHUNK = 1 << 13
+
+def pretty_chunks(n: noun, tail_pos: bool = False, max_length=None,
+                  max_depth=None, max_items=None):
+    """yield the text of a pretty-printed noun in pieces.
+
+    max_length cuts the text off after that many characters and ends
+    it with '...'.  cells nested deeper than max_depth print as '[...]',
+    and lists longer than max_items show only their first max_items
+    elements.  the work done is bounded by the text produced, except
+    that an elided list's remaining elements are counted.
+
+    >>> ''.join(pretty_chunks(Cell(1, Cell(2, 3))))
+    '[1 2 3]'
     """
 
-    if deep(n):
-        return hash(n)
-    return mum(0xcafebabe, 0x7fff, n)
+    parts = []
+    size = 0        # characters in parts
+    total = 0       # characters already yielded
+    # ('', text) or (cell's remaining spine, depth, elements shown, close)
+    stack = [(n, 0, -1, '' if tail_pos else None)]
+    while stack:
+        frame = stack.pop()
+        if len(frame) == 2:
+            text = frame[1]
+        else:
+            rest, depth, shown, close = frame
+            if shown < 0:
+                # a noun to print; close is None unless it is in tail
+                # position
+                if not deep(rest):
+                    text = str(rest)
+                elif max_depth is not None and depth >= max_depth:
+                    text = '[...]'
+                elif close is None:
+                    stack.append((rest, depth, 0, ']'))
+                    text = '['
+                else:
+                    stack.append((rest, depth, 0, ''))
+                    continue
+            elif max_items is not None and shown >= max_items:
+                more = 1
+                while deep(rest):
+                    more += 1
+                    rest = rest.tail
+                text = ' ... %d more%s' % (more, close)
+            elif deep(rest):
+                stack.append((rest.tail, depth, shown + 1, close))
+                stack.append((rest.head, depth + 1, -1, None))
+                if shown == 0:
+                    continue
+                text = ' '
+            else:
+                text = ' %s%s' % (rest, close)
+        if max_length is not None and total + size + len(text) > max_length:
+            parts.append(text[:max_length - total - size])
+            parts.append('...')
+            yield ''.join(parts)
+            return
+        parts.append(text)
+        size += len(text)
+        if size >= _PRETTY_CHUNK:
+            yield ''.join(parts)
+            parts = []
+            total += size
+            size = 0
+    if parts:
+        yield ''.join(parts)
+
+def pretty_into(n: noun, write, tail_pos: bool = False, **limits) -> int:
+    """pretty-print n, passing the text to write in pieces (see
+    pretty_chunks for the limits).  returns the number of characters.
+    """
 
-def pretty(n: noun, tail_pos:bool):
+    count = 0
+    for chunk in pretty_chunks(n, tail_pos, **limits):
+        write(chunk)
+        count += len(chunk)
+    return count
+
+def pretty(n: noun, tail_pos: bool, **limits):
     """pretty-print a noun, in or out of tail position.
 
     >>> pretty(1, True)
@@ -177,11 +434,17 @@ def pretty(n: noun, tail_pos:bool):
     '[1 2 3]'
     >>> pretty(Cell(Cell(1,2), 3), True)
     '[1 2] 3'
+    >>> pretty(parse(' '.join(map(str, range(10001)))), False, max_items=3)
+    '[0 1 2 ... 9998 more]'
+    >>> pretty(parse('[1 [2 [3 4] 5] 6]'), False, max_depth=2)
+    '[1 [2 [...] 5] 6]'
+    >>> pretty(parse('[1 2 3 4]'), False, max_length=4)
+    '[1 2...'
     """
 
-    if deep(n):
-        return n.pretty(tail_pos)
-    return str(n)
+    if not deep(n) and not limits:
+        return str(n)
+    return ''.join(pretty_chunks(n, tail_pos, **limits))
 
 def translate(seq):
     """turn python sequences into tuples.
@@ -202,10 +465,62 @@ def translate(seq):
         return 0
     return r(0, c)
 
-def parse(s: str):
+# read streams in pieces of this many characters (or bytes)
+_PARSE_CHUNK = 1 << 16
+
+# text splits into brackets and the runs of words between them; runs
+# of plain digits and spaces are converted in one go
+_PARTS = re.compile(r'[\[\]]|[^\[\]]+')
+_PLAIN = re.compile(r'[0-9 \[\]]*')
+_WORD = re.compile(r'[^ ]+')
+
+def _parse_atom(word: str, at: int, names=None) -> noun:
+    """the atom a word spells, or the noun names gives it; the word
+    starts at position at"""
+
+    if word.isdigit():
+        return int(word)
+    if names is not None and word in names:
+        return names[word]
+    if word[0] == '.':
+        raise ValueError('floating dot at %d' % at)
+    for j, c in enumerate(word):
+        if c != '.' and not c.isdigit():
+            raise ValueError('unrecognized character %s at %d' % (c, at + j))
+    return int(word.replace('.', ''))
+
+def _read(f):
+    while True:
+        chunk = f.read(_PARSE_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
+def _decode(chunks):
+    """str pieces from str pieces, or from pieces of UTF-8 bytes"""
+
+    decoder = None
+    for chunk in chunks:
+        if not isinstance(chunk, str):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')()
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if decoder is not None:
+        rest = decoder.decode(b'', True)
+        if rest:
+            yield rest
+
+def parse(s, table=None, names=None):
     """parse strings into nouns. dots in atoms are ignored,
     outermost braces can be omitted.
 
+    s is a str, a bytes-like object of UTF-8 text, or a stream to read
+    it from; streams are read in pieces, so only the noun itself is
+    held in memory.  if table is a HashCons, cells are built through it
+    and repeated subtrees are shared.  names maps words to nouns, which
+    are spliced in (not copied) wherever those words appear.
+
     >>> parse('1.024')
     1024
     >>> x = parse('[[1 2] 3]')
@@ -214,141 +529,172 @@ def parse(s: str):
     >>> x = parse('[1 2] 3')
     >>> [x.head.head, x.head.tail, x.tail]
     [1, 2, 3]
+    >>> x = parse(b'[[1 2] [1 2]]', HashCons())
+    >>> x.head is x.tail
+    True
+    >>> y = parse('[0 x]', names={'x': x})
+    >>> y.tail is x
+    True
     """
 
-    sep = True
-    start = 0
-    wait = []
-    top = (0, [])
-    num = []
-
-    def frame(i: int):
-        return (i, [])
-
-    def end_atom():
-        nonlocal sep
-        if not sep:
-            sep = True
-            top[1].append(int(''.join(num)))
-            num.clear()
-
-    def end_cell():
-        items = top[1]
-        count = len(items)
-        if 0 == count:
+    if isinstance(s, str):
+        pieces = (s,)
+    elif isinstance(s, (bytes, bytearray, memoryview)):
+        view = memoryview(s).cast('B')
+        pieces = _decode(view[i:i + _PARSE_CHUNK]
+                         for i in range(0, len(view), _PARSE_CHUNK))
+    else:
+        pieces = _decode(_read(s))
+    cons = Cell if table is None else table.cons
+
+    def end_cell(items):
+        if not items:
             return 0
-        count -= 1
-        tail = items[count]
-        while count > 0:
-            count -= 1
-            tail = Cell(items[count], tail)
+        tail = items.pop()
+        while items:
+            tail = cons(items.pop(), tail)
         return tail
 
-    for i in range(0, len(s)):
-        c = s[i]
-        match c:
-            case '[':
-                end_atom()
-                wait.append(top)
-                top = frame(i)
-            case ']':
+    wait = []       # items of each enclosing cell
+    opens = []      # and the position of its [
+    items = []
+    at = 0          # position in the whole input
+    text = ''
+    for piece in pieces:
+        text += piece
+        # a word running up to the end may go on in the next piece
+        end = len(text)
+        if text and text[-1] not in '[] ':
+            end = max(text.rfind(' '), text.rfind('['), text.rfind(']')) + 1
+        plain = _PLAIN.fullmatch(text, 0, end) is not None
+        for part in _PARTS.findall(text, 0, end):
+            if part == '[':
+                wait.append(items)
+                opens.append(at)
+                items = []
+                at += 1
+            elif part == ']':
                 if not wait:
-                    raise ValueError('unmatched ] at %d' % i)
-                end_atom()
-                val = end_cell()
-                top = wait.pop()
-                top[1].append(val)
-            case ' ':
-                end_atom()
-            case '.':
-                if sep:
-                    raise ValueError('floating dot at %d' % i)
-            case _:
-                if not str.isdigit(c):
-                    raise ValueError('unrecognized character %s at %d' % (c, i))
+                    raise ValueError('unmatched ] at %d' % at)
+                if len(items) == 2:
+                    value = cons(items[0], items[1])
                 else:
-                    if sep:
-                        start = i
-                        sep = False
-                    num.append(c)
+                    value = end_cell(items)
+                items = wait.pop()
+                opens.pop()
+                items.append(value)
+                at += 1
+            elif plain:
+                items += map(int, part.split())
+                at += len(part)
+            else:
+                for m in _WORD.finditer(part):
+                    items.append(_parse_atom(m.group(), at + m.start(),
+                                             names))
+                at += len(part)
+        text = text[end:]
+    if text:
+        items.append(_parse_atom(text, at, names))
     if wait:
-        raise ValueError('unclosed [ at %d' % top[0])
-    end_atom()
-    return end_cell()
+        raise ValueError('unclosed [ at %d' % opens[-1])
+    return end_cell(items)
 
-def jam_to_stream(n: noun, out: BitArray):
-    """jam but put the bits into a stream
+# flush the jam accumulator once it holds this many bits
+_JAM_FLUSH = 1 << 15
 
-    >>> s = BitArray()
-    >>> jam_to_stream(Cell(0,0), s)
-    >>> s
-    BitArray('0b100101')
-    """
-
-    cur = 0
-    refs = {}
-
-    def bit(b: bool):
-        nonlocal cur
-        out.append([b])
-        cur += 1
-
-    def zero():
-        bit(False)
-
-    def one():
-        bit(True)
+def jam_into(n: noun, write) -> int:
+    """jam n, passing the little-endian bytes of the result to write
+    as they are produced.  returns the length in bits.
 
-    def bits(num: int, count: int):
-        nonlocal cur
-        for i in range(0, count):
-            out.append([(num & (1 << i)) != 0])
-        cur += count
+    Each atom, cell tag or back-reference is emitted as one integer
+    field into an accumulator, which is flushed a whole number of bytes
+    at a time, so the cost is linear in the output.
 
-    def save(a: noun):
-        refs[a] = cur
+    >>> out = bytearray()
+    >>> jam_into(Cell(0, 0), out.extend)
+    6
+    >>> out
+    bytearray(b')')
+    """
 
-    def mat(i: int):
-        if 0 == i:
-            one()
-        else:
-            a = i.bit_length()
-            b = a.bit_length()
-            above = b + 1
-            below = b - 1
-            bits(1 << b, above)
-            bits(a & ((1 << below) - 1), below)
-            bits(i, a)
-
-    def back(ref: int):
-        one()
-        one()
-        mat(ref)
-
-    def r(a: noun):
+    refs = {}
+    acc = 0       # pending bits, least significant first
+    fill = 0      # how many bits are pending
+    flushed = 0   # how many bits have been written
+
+    stack = [n]
+    while stack:
+        a = stack.pop()
+        cur = flushed + fill
         dupe = refs.get(a)
         if deep(a):
             if dupe:
-                back(dupe)
+                # back-reference: 1 1 mat(dupe)
+                field, width = _mat(dupe)
+                field = (field << 2) | 3
+                width += 2
             else:
-                save(a)
-                one()
-                zero()
-                r(a.head)
-                r(a.tail)
-        elif dupe:
-            isize = a.bit_length()
-            dsize = dupe.bit_length()
-            if isize < dsize:
-                zero()
-                mat(a)
-            else:
-                back(dupe)
+                refs[a] = cur
+                # cell: 1 0, then head and tail
+                field = 1
+                width = 2
+                stack.append(a.tail)
+                stack.append(a.head)
+        elif dupe and a.bit_length() >= dupe.bit_length():
+            field, width = _mat(dupe)
+            field = (field << 2) | 3
+            width += 2
         else:
-            save(a)
-            zero()
-            mat(a)
-    r(n)
+            if not dupe:
+                refs[a] = cur
+            # atom: 0 mat(a)
+            field, width = _mat(a)
+            field <<= 1
+            width += 1
+
+        acc |= field << fill
+        fill += width
+        if fill >= _JAM_FLUSH:
+            count = fill >> 3
+            write((acc & ((1 << (count << 3)) - 1)).to_bytes(count, 'little'))
+            acc >>= count << 3
+            fill -= count << 3
+            flushed += count << 3
+
+    if fill:
+        write(acc.to_bytes((fill + 7) >> 3, 'little'))
+    return flushed + fill
+
+def _mat(i: int):
+    """the mat (length-prefixed) encoding of i, as (field, width)
+
+    >>> _mat(0)
+    (1, 1)
+    >>> _mat(1)
+    (6, 3)
+    """
+
+    if 0 == i:
+        return 1, 1
+    a = i.bit_length()
+    b = a.bit_length()
+    field = (1 << b) | ((a & ((1 << (b - 1)) - 1)) << (b + 1)) | (i << (b << 1))
+    return field, (b << 1) + a
+
+def jam_to_stream(n: noun, out: BitArray):
+    """jam but put the bits into a stream
+
+    >>> s = BitArray()
+    >>> jam_to_stream(Cell(0,0), s)
+    >>> s
+    BitArray('0b100101')
+    """
+
+    buf = bytearray()
+    length = jam_into(n, buf.extend)
+    bits = BitArray(uint=int.from_bytes(buf, 'little'), length=length)
+    bits.reverse()
+    out.append(bits)
 
 def read_int(length: int, s: BitArray):
     """read length bits from s and make a python integer.
@@ -375,9 +721,20 @@ def jam(n: noun):
     22840095095806892874257389573
     """
 
-    out = BitArray()
-    jam_to_stream(n, out)
-    return read_int(len(out), out)
+    out = bytearray()
+    jam_into(n, out.extend)
+    return int.from_bytes(out, 'little')
+
+def jam_bytes(n: noun) -> bytes:
+    """jam to the little-endian bytes of the resulting atom
+
+    >>> jam_bytes(Cell(0, 0))
+    b')'
+    """
+
+    out = bytearray()
+    jam_into(n, out.extend)
+    return bytes(out)
 
 def cue_from_stream(s: BitArray):
     """cue but read the bits from a stream
@@ -387,64 +744,165 @@ def cue_from_stream(s: BitArray):
     0
     """
 
+    bits = s[:]
+    bits.reverse()
+    return cue(bits.uint if len(bits) else 0)
+
+def cue_buffer(buf) -> noun:
+    """cue from the little-endian bytes of a jammed atom: bytes,
+    bytearray, memoryview, mmap or anything else that slices into a
+    buffer.
+
+    Fields are read as whole bit ranges, and cells are decoded on an
+    explicit stack, so long lists don't touch the recursion limit.
+
+    >>> cue_buffer(b'\\x01')
+    Traceback (most recent call last):
+    ...
+    ValueError: cue: truncated input at bit 8
+    >>> str(cue_buffer(bytes([0x31, 0x12])))
+    '[1 2]'
+    """
+
+    size = len(buf) << 3
     refs = {}
-    cur = 0
-    position = 0
-
-    def bits(n: int):
-        nonlocal cur, position
-        cur += n
-        result = 0
-        for i in range(n):
-            result |= (1 if s[position] else 0) << i
-            position += 1
-        return result
-
-    def one():
-        nonlocal cur, position
-        cur += 1
-        bit = s[position]
-        position += 1
-        return bit
-    
-    def rub():
-        z = 0
-        while not one():
-            z += 1
-        if 0 == z:
+    stack = []  # (start of a cell, its head or None if still pending)
+    pos = 0
+
+    def read(width: int) -> int:
+        nonlocal pos
+        if width == 0:
+            return 0
+        start = pos
+        pos += width
+        if pos > size:
+            # past the end (or a corrupt length): fail before the mask
+            raise ValueError('cue: truncated input at bit %d' % size)
+        value = int.from_bytes(buf[start >> 3:(pos + 7) >> 3], 'little')
+        return (value >> (start & 7)) & ((1 << width) - 1)
+
+    def rub() -> int:
+        # count the zeros before the next one bit
+        nonlocal pos
+        i = pos >> 3
+        byte = buf[i] >> (pos & 7) if i < len(buf) else 0
+        if byte:
+            zeros = (byte & -byte).bit_length() - 1
+        else:
+            i += 1
+            while i < len(buf) and 0 == buf[i]:
+                i += 1
+            if i >= len(buf):
+                raise ValueError('cue: truncated input at bit %d' % size)
+            byte = buf[i]
+            zeros = (i << 3) + (byte & -byte).bit_length() - 1 - pos
+        pos += zeros + 1
+        if 0 == zeros:
             return 0
-        below = z - 1
-        lbits = bits(below)
-        bex = 1 << below
-        return bits(bex ^ lbits)
-
-    def r(start: int):
-        ret = None
-        if one():
-            if one():
-                ret = refs[rub()]
+        below = zeros - 1
+        return read((1 << below) | read(below))
+
+    while True:
+        start = pos
+        if pos + 1 >= size:
+            # fewer than two bits left: only a lone 0 tag can still fit
+            if pos >= size or (buf[pos >> 3] >> (pos & 7)) & 1:
+                raise ValueError('cue: truncated input at bit %d' % size)
+        tag = (buf[pos >> 3] >> (pos & 7)) & 1
+        pos += 1
+        if tag:
+            tag = (buf[pos >> 3] >> (pos & 7)) & 1
+            pos += 1
+            if tag:
+                ref = rub()
+                ret = refs.get(ref)
+                if ret is None:
+                    raise ValueError('cue: bad back-reference %d at bit %d'
+                                     % (ref, start))
             else:
-                hed = r(cur)
-                tal = r(cur)
-                ret = Cell(hed, tal)
+                stack.append((start, None))
+                continue
         else:
             ret = rub()
         refs[start] = ret
-        return ret
-    return r(cur)
 
-def cue(i: int):
+        # finish every cell whose tail this completes
+        while stack:
+            cell_start, hed = stack[-1]
+            if hed is None:
+                stack[-1] = (cell_start, ret)
+                break
+            stack.pop()
+            ret = Cell(hed, ret)
+            refs[cell_start] = ret
+        else:
+            return ret
+
+def cue(i) -> noun:
     """urbit deserialization: @ -> *
 
+    i may be an int or the little-endian bytes of one (see cue_buffer).
+
     >>> str(cue(22840095095806892874257389573))
     '[[1234567890987654321 1234567890987654321] 1234567890987654321 1234567890987654321]'
+    >>> str(cue(b'\\x31\\x12'))
+    '[1 2]'
+    """
+
+    if isinstance(i, int):
+        i = i.to_bytes((i.bit_length() + 7) >> 3, 'little')
+    return cue_buffer(i)
+
+def jam_to_file(n: noun, f) -> int:
+    """jam n into a file, given as a path or a binary file object.
+    bytes are written as they are produced.  returns the byte count.
+
+    >>> import io
+    >>> f = io.BytesIO()
+    >>> jam_to_file(Cell(0, 0), f)
+    1
+    >>> f.getvalue()
+    b')'
+    """
+
+    if isinstance(f, (str, os.PathLike)):
+        with open(f, 'wb') as out:
+            return jam_to_file(n, out)
+    return (jam_into(n, f.write) + 7) >> 3
+
+def cue_from_file(f, use_mmap=True) -> noun:
+    """cue a jammed noun from a file, given as a path or a binary file
+    object.  a file object is read from its current position to the
+    end, and left there.  regular files are memory-mapped rather than
+    read in, so only the decoded noun takes up memory.
+
+    >>> import io
+    >>> str(cue_from_file(io.BytesIO(b'\\x31\\x12')))
+    '[1 2]'
+    >>> f = io.BytesIO(b'\\xff\\x31\\x12')
+    >>> _ = f.read(1)
+    >>> str(cue_from_file(f))
+    '[1 2]'
     """
 
-    bits = BitArray()
-    while i > 0:
-        bits.append([i & 1 == 1])
-        i >>= 1
-    return cue_from_stream(bits)
+    if isinstance(f, (str, os.PathLike)):
+        with open(f, 'rb') as src:
+            return cue_from_file(src, use_mmap)
+    if use_mmap:
+        try:
+            fileno = f.fileno()
+            size = os.fstat(fileno).st_size
+            start = f.tell()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            size = start = 0
+        if size > start:
+            # maps must start on a page boundary, so map it all and skip
+            with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as m:
+                with memoryview(m) as whole, whole[start:] as rest:
+                    n = cue_buffer(rest)
+            f.seek(size)
+            return n
+    return cue_buffer(f.read())
 
 if '__main__' == __name__:
     import doctest
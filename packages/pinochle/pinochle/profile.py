@@ -0,0 +1,131 @@
+"""
+Opt-in instrumentation for the evaluator.
+
+Pass a Profile to nock() to count what a run does:
+
+    >>> from pinochle import nock, parse
+    >>> p = Profile()
+    >>> nock(41, parse('[4 0 1]'), profile=p)
+    42
+    >>> p.steps, p.ops['4'], p.ops['0']
+    (2, 1, 1)
+
+A profiled run compiles its formulas one opcode per step instead of
+folding them into closures, so every opcode is seen (and the run is
+slower).  Without a profile the evaluator pays one comparison per step.
+"""
+
+import time
+
+from .noun import deep, mug
+from .jets import cord
+
+# opcodes 0-11, then the evaluator's node kinds for autocons and for
+# native code (closures, and crashes found at compile time)
+OPS = tuple(str(op) for op in range(12)) + ('cons', 'native')
+
+_MEMO = cord('memo')
+
+
+class Profile:
+    """Counters for one or more nock() runs.
+
+    steps is the number of reductions, ops and seconds count them and
+    the time spent in each by opcode, cells is the number of cells the
+    reductions build (autocons, opcodes 8 and 10, and %memo keys; not
+    those built by jets), and max_depth is the deepest the evaluator's
+    continuation stack got.  formulas counts, by mug, the formulas run
+    by nock() itself and by opcodes 2 and 9.
+
+    If sample is given, sample(mug, formula) is called for every
+    every-th of those formulas.
+    """
+
+    def __init__(self, sample=None, every=1, timing=True):
+        self.sample = sample
+        self.every = every
+        self.timing = timing
+        self.reset()
+
+    def reset(self):
+        """zero every counter"""
+
+        self.steps = 0
+        self.counts = [0] * len(OPS)
+        self.times = [0.0] * len(OPS)
+        self.cells = 0
+        self.max_depth = 0
+        self.formulas = {}
+        self.entered = 0
+        self._last = None
+        self._clock = 0.0
+
+    # called by the evaluator
+
+    def start(self, formula):
+        self._last = None
+        self.enter(formula)
+        if self.timing:
+            self._clock = time.perf_counter()
+
+    def stop(self):
+        if self.timing and self._last is not None:
+            self.times[self._last] += time.perf_counter() - self._clock
+        self._last = None
+
+    def enter(self, formula):
+        m = mug(formula)
+        self.formulas[m] = self.formulas.get(m, 0) + 1
+        self.entered += 1
+        if self.sample is not None and self.entered % self.every == 0:
+            self.sample(m, formula)
+
+    def step(self, op, node, depth):
+        self.steps += 1
+        self.counts[op] += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if op == 12 or op == 8:
+            self.cells += 1
+        elif op == 10:
+            if not deep(node[1]) and node[1] > 1:
+                self.cells += node[1].bit_length() - 1
+        elif op == 11 and node[1] == _MEMO:
+            self.cells += 1
+        if self.timing:
+            now = time.perf_counter()
+            if self._last is not None:
+                self.times[self._last] += now - self._clock
+            self._last = op
+            self._clock = now
+
+    # reports
+
+    @property
+    def ops(self):
+        """step counts by opcode name"""
+
+        return dict(zip(OPS, self.counts))
+
+    @property
+    def seconds(self):
+        """time spent in each opcode's steps, by opcode name"""
+
+        return dict(zip(OPS, self.times))
+
+    def hot(self, n=10):
+        """the n most run formulas, as (mug, count), most first"""
+
+        return sorted(self.formulas.items(), key=lambda kv: -kv[1])[:n]
+
+    def report(self) -> dict:
+        """everything counted, as plain data"""
+
+        return {
+            'steps': self.steps,
+            'ops': {k: v for k, v in self.ops.items() if v},
+            'seconds': {k: v for k, v in self.seconds.items() if v},
+            'cells': self.cells,
+            'max_depth': self.max_depth,
+            'hot': self.hot(),
+        }
@@ -12,7 +12,7 @@ setup(
     long_description=long_description,
     long_description_content_type='text/markdown',
     url='https://github.com/sigilante/pinochle',
-    packages=find_packages(),
+    packages=find_packages(exclude=['bench', 'bench.*']),
     install_requires=[
         'mmh3',
         'bitstring',
@@ -0,0 +1,89 @@
+import pytest
+from pinochle import *
+
+TREE = "[[[1 2] [3 4]] [[5 6] [7 8]]]"
+
+def test_fas_many_matches_fas():
+    tree = parse(TREE)
+    axes = list(range(1, 16)) + [15, 2, 1]
+    assert fas_many(axes, tree) == [fas(x, tree) for x in axes]
+
+def test_fas_many_crashes():
+    with pytest.raises(Exception, match="fail: atom"):
+        fas_many([2, 16], parse(TREE))
+    with pytest.raises(Exception, match="fail"):
+        fas_many([0], parse(TREE))
+
+def test_fas_deep_axis():
+    # 100,000 levels down the tail of a list
+    x = 0
+    for i in range(100000):
+        x = Cell(i, x)
+    assert fas((1 << 100001) - 1, x) == 0
+    assert fas((1 << 100000) - 2, x) == 1
+    assert fas_many([(1 << 100000) - 2, 2], x) == [1, 99999]
+
+# Format: (axis, value, tree_str, expected_str)
+HAX_TESTS = [
+    (1, 9, TREE, "9"),
+    (2, 9, "[1 2]", "[9 2]"),
+    (3, 9, "[1 2]", "[1 9]"),
+    (4, 9, TREE, "[[9 [3 4]] [5 6] [7 8]]"),
+    (13, 9, TREE, "[[[1 2] [3 4]] [5 9] [7 8]]"),
+    (14, 9, TREE, "[[[1 2] [3 4]] [5 6] [9 8]]"),
+]
+
+@pytest.mark.parametrize("axis,value,tree_str,expected_str", HAX_TESTS)
+def test_hax(axis, value, tree_str, expected_str):
+    assert hax(axis, value, parse(tree_str)) == parse(expected_str)
+
+def test_hax_shares_siblings():
+    tree = parse(TREE)
+    edited = hax(13, 9, tree)
+    assert edited.head is tree.head
+    assert edited.tail.tail is tree.tail.tail
+
+def test_hax_crashes():
+    with pytest.raises(Exception, match="fail: atom"):
+        hax(4, 9, parse("[1 2]"))
+    with pytest.raises(Exception, match="fail"):
+        hax(0, 9, parse("[1 2]"))
+
+def test_hax_deep_axis():
+    x = 0
+    for i in range(100000):
+        x = Cell(i, x)
+    y = hax((1 << 100001) - 1, 7, x)
+    assert fas((1 << 100001) - 1, y) == 7
+    assert y.head == 99999
+
+EDIT_BATCHES = [
+    [(4, 9), (5, 8)],
+    [(2, Cell(1, 2)), (4, 8)],  # edit inside an earlier edit
+    [(4, 9), (2, 8)],           # a later edit replaces an earlier one
+    [(15, 1), (14, 2), (12, 3), (8, 4), (1, Cell(5, 5)), (3, 6)],
+    [(6, 1), (6, 2), (7, 3)],
+]
+
+@pytest.mark.parametrize("edits", EDIT_BATCHES)
+def test_hax_many_matches_sequential(edits):
+    tree = parse(TREE)
+    expected = tree
+    for axis, value in edits:
+        expected = hax(axis, value, expected)
+    assert hax_many(edits, tree) == expected
+
+@pytest.mark.parametrize("edits, tree", [
+    ([(2, 0), (12, 1)], "[1 2]"),
+    ([(6, 9), (3, 5)], "[1 2]"),       # a later edit replaces the bad path
+    ([(12, 9), (1, 5)], "[1 2 3]"),
+    ([(7, 1), (14, 2), (3, 0)], "[1 2 3]"),
+])
+def test_hax_many_crashes(edits, tree):
+    with pytest.raises(Exception, match="fail: atom"):
+        hax_many(edits, parse(tree))
+
+def test_hax_many_without_edits():
+    tree = parse(TREE)
+    assert hax_many([], tree) is tree
+    assert hax_many([], 5) == 5
@@ -0,0 +1,53 @@
+import pytest
+from pinochle import *
+
+DEC = "[8 [1 0] 8 [1 6 [5 [0 7] 4 0 6] [0 6] 9 2 [0 2] [4 0 6] 0 7] 9 2 0 1]"
+LOOP = "[8 [1 9 2 0 1] 9 2 0 1]"
+
+def test_nock_many_in_order():
+    subjects = list(range(1, 200))
+    results = list(nock_many(subjects, parse(DEC), processes=2))
+    assert results == [n - 1 for n in subjects]
+
+def test_nock_many_cells_and_generators():
+    subjects = (Cell(n, Cell(n, n + 1)) for n in range(50))
+    results = list(nock_many(subjects, parse('[0 7]'), processes=2))
+    assert results == list(range(1, 51))
+
+def test_nock_many_as_completed():
+    results = dict(nock_many(range(100), parse('[4 0 1]'), processes=3,
+                             ordered=False, chunksize=7))
+    assert results == {i: i + 1 for i in range(100)}
+
+def test_nock_map():
+    pairs = [(Cell(1, 2), parse('[0 2]')), (41, parse('[4 0 1]')),
+             (0, parse('[1 7]'))]
+    assert list(nock_map(pairs, processes=2)) == [1, 42, 7]
+
+@pytest.mark.parametrize('subject, formula, message', [
+    (1, '[0 2]', 'fail: atom'),           # axis into an atom
+    (Cell(1, 2), '[4 0 1]', 'fail: cell'),  # increment of a cell
+])
+def test_crashes_are_reported_per_item(subject, formula, message):
+    pairs = [(5, parse('[4 0 1]')), (subject, parse(formula)),
+             (6, parse('[4 0 1]'))]
+    results = list(nock_map(pairs, processes=2))
+    assert isinstance(results[1], Crash)
+    assert results[1].index == 1
+    assert results[1].message == message
+    assert results[0] == 6 and results[2] == 7
+
+def test_budget_per_item():
+    pairs = [(0, parse(LOOP)), (10, parse(DEC))]
+    loop, dec = nock_map(pairs, processes=2, steps=10000)
+    assert isinstance(loop, Crash) and loop.ename == 'OutOfBudget'
+    assert dec == 9
+
+def test_bad_inputs_crash_alone():
+    results = list(nock_many([1, -1, 2], parse('[4 0 1]'), processes=2))
+    assert results[0] == 2 and results[2] == 3
+    assert isinstance(results[1], Crash) and results[1].index == 1
+    pairs = [(1, parse('[4 0 1]')), (1, -1), (1,), (3, parse('[0 1]'))]
+    results = list(nock_map(pairs, processes=2))
+    assert results[0] == 2 and results[3] == 3
+    assert [r.index for r in results[1:3]] == [1, 2]
@@ -0,0 +1,56 @@
+import threading
+import time
+import pytest
+from pinochle import *
+
+# *[0 LOOP] never returns
+LOOP = "[8 [1 9 2 0 1] 9 2 0 1]"
+DEC = "[8 [1 0] 8 [1 6 [5 [0 7] 4 0 6] [0 6] 9 2 [0 2] [4 0 6] 0 7] 9 2 0 1]"
+
+def test_step_limit():
+    with pytest.raises(OutOfBudget) as e:
+        nock(0, parse(LOOP), budget=Budget(steps=500))
+    assert e.value.reason == 'steps'
+    assert e.value.steps == 500
+
+def test_within_budget():
+    budget = Budget(steps=100000)
+    assert nock(100, parse(DEC), budget=budget) == 99
+    assert 0 < budget.used < 100000
+    assert budget.remaining == 100000 - budget.used
+
+def test_budget_spans_runs():
+    budget = Budget(steps=1000)
+    nock(100, parse(DEC), budget=budget)
+    with pytest.raises(OutOfBudget):
+        for _ in range(100):
+            nock(100, parse(DEC), budget=budget)
+    assert budget.used == 1000
+
+def test_deadline():
+    start = time.monotonic()
+    with pytest.raises(OutOfBudget) as e:
+        nock(0, parse(LOOP), budget=Budget(seconds=0.05))
+    assert e.value.reason == 'deadline'
+    assert e.value.steps > 0
+    assert time.monotonic() - start < 5
+
+def test_cancel_from_another_thread():
+    token = threading.Event()
+    threading.Timer(0.05, token.set).start()
+    with pytest.raises(OutOfBudget) as e:
+        nock(0, parse(LOOP), budget=Budget(token=token))
+    assert e.value.reason == 'cancelled'
+
+def test_cancelled_before_start():
+    token = threading.Event()
+    token.set()
+    with pytest.raises(OutOfBudget) as e:
+        nock(41, parse("[4 0 1]"), budget=Budget(token=token))
+    assert e.value.steps == 0
+
+def test_budget_with_profile():
+    p = Profile()
+    with pytest.raises(OutOfBudget):
+        nock(0, parse(LOOP), profile=p, budget=Budget(steps=300))
+    assert p.steps == 300
@@ -0,0 +1,49 @@
+import pytest
+import sys
+from pinochle import *
+
+def long_list(n, last=0):
+    x = last
+    for i in range(n):
+        x = Cell(i, x)
+    return x
+
+def test_deep_equality():
+    assert long_list(100000) == long_list(100000)
+    assert long_list(100000) != long_list(100000, last=1)
+
+def test_unify_shares_storage():
+    x, y = long_list(1000), long_list(1000)
+    assert x == y
+    assert x.tail is y.tail
+
+def test_unify_off():
+    set_unify(False)
+    try:
+        x, y = long_list(1000), long_list(1000)
+        assert x == y
+        assert x.tail is not y.tail
+    finally:
+        set_unify(True)
+
+def test_failed_comparison_keeps_structure():
+    x = parse("[[1 2] [3 4] 5]")
+    y = parse("[[1 2] [3 4] 6]")
+    assert x != y
+    assert str(x) == "[[1 2] [3 4] 5]"
+    assert str(y) == "[[1 2] [3 4] 6]"
+
+def test_opcode_9_shares_core():
+    # the arm runs against the very core that was computed, uncopied
+    core = parse("[[0 1] 42]")
+    assert nock(core, parse("[9 2 0 1]")) is core
+
+def test_big_mug_cache_is_bounded_by_bits():
+    noun_module = sys.modules['pinochle.noun']
+    cache = noun_module._big_mugs
+    cache.clear()
+    atoms = [(1 << (1 << 20)) + i for i in range(100)]
+    mugs = [mug(a) for a in atoms]
+    assert cache.weight <= noun_module._BIG_MUG_BITS
+    assert 0 < len(cache) < len(atoms)
+    assert mugs == [mug(a) for a in atoms]
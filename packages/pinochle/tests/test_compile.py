@@ -0,0 +1,43 @@
+import pytest
+from pinochle import *
+
+def test_compile_cached_by_structure():
+    clear_formula_cache()
+    node = compile_formula(parse("[9 2 0 1]"))
+    assert compile_formula(parse("[9 2 0 1]")) is node
+
+def test_compile_uncached_by_structure():
+    clear_formula_cache()
+    node = compile_formula(parse("[9 2 0 1]"), structural=False)
+    assert compile_formula(parse("[9 2 0 1]"), structural=False) is not node
+
+def test_cache_is_bounded():
+    clear_formula_cache()
+    set_formula_cache_size(8)
+    try:
+        for i in range(100):
+            compile_formula(Cell(1, i))
+        from pinochle.nock import _compiled, _compiled_ids
+        assert len(_compiled) == 8 and len(_compiled_ids) == 8
+    finally:
+        set_formula_cache_size(4096)
+
+def test_malformed_branch_not_taken():
+    # the no branch is an invalid formula but is never evaluated
+    assert nock(0, parse("[6 [1 0] [1 11] 12 0]")) == 11
+    with pytest.raises(Exception, match="Unknown opcode: 12"):
+        nock(0, parse("[6 [1 1] [1 11] 12 0]"))
+
+def test_deep_pure_formula():
+    # [4 4 4 ... 0 1] nested deeper than a single closure covers
+    formula = Cell(0, 1)
+    for i in range(300):
+        formula = Cell(4, formula)
+    assert nock(0, formula) == 300
+
+def test_dynamic_formula_from_subject():
+    # the same arm object is compiled once and reused on every call
+    clear_formula_cache()
+    core = parse("[[4 0 6] 41 0]")
+    assert nock(core, parse("[9 2 0 1]")) == 42
+    assert nock(core, parse("[9 2 0 1]")) == 42
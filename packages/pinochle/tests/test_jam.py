@@ -0,0 +1,109 @@
+import pytest
+from pinochle import *
+
+# Format: (noun_str, jammed)
+JAM_TESTS = [
+    ("0", 2),
+    ("1", 12),
+    ("2", 72),
+    ("[0 0]", 41),
+    ("[1 2]", 4657),
+    ("[[1 2] [1 2]]", 4835525),
+    ("[1 1 1]", 52337),
+    ("[[1 2] 3 [1 2]]", 2479933637),
+    ("[123456789 123456789]", 162639567304449),
+]
+
+@pytest.mark.parametrize("noun_str,jammed", JAM_TESTS)
+def test_jam(noun_str, jammed):
+    n = parse(noun_str)
+    assert jam(n) == jammed
+    assert jam_bytes(n) == jammed.to_bytes((jammed.bit_length() + 7) // 8, 'little')
+    assert cue(jammed) == n
+
+def test_jam_into_chunks():
+    x = 0
+    for i in range(20000):
+        x = Cell(Cell(i, 1 << 64), x)
+    chunks = []
+    length = jam_into(x, chunks.append)
+    assert len(chunks) > 1
+    jammed = int.from_bytes(b''.join(chunks), 'little')
+    assert jammed.bit_length() == length
+    assert jammed == jam(x)
+
+def test_jam_big_atom():
+    a = (1 << 100000) - 12345
+    # 0, then mat: 17 zeros, a 1, 16 bits of length, then the atom
+    assert jam(a) >> 35 == a
+
+def test_cue_long_list():
+    x = 0
+    for i in range(50000):
+        x = Cell(Cell(i, 1 << 64), x)
+    y = cue(jam(x))
+    for i in reversed(range(50000)):
+        assert y.head.head == i and y.head.tail == 1 << 64
+        y = y.tail
+    assert y == 0
+
+def test_cue_big_atom():
+    a = (1 << 100000) - 12345
+    assert cue(jam(a)) == a
+
+def test_cue_buffers():
+    n = parse("[[1 2] 3 [1 2]]")
+    data = jam_bytes(n)
+    assert cue(data) == n
+    assert cue(bytearray(data)) == n
+    assert cue(memoryview(data)) == n
+
+def test_cue_truncated():
+    with pytest.raises(ValueError, match="truncated"):
+        cue(0)
+    with pytest.raises(ValueError, match="truncated"):
+        cue(jam_bytes(parse("[1 2]"))[:1])
+
+@pytest.mark.parametrize('data', [
+    jam_bytes(Cell(1 << 200, 7))[:-1],  # the last byte dropped
+    jam_bytes(1 << 5000)[:-1],
+    (1 << 60) | 1,                      # a length prefix far past the end
+    (1 << 600) | (1 << 300) | 1,
+])
+def test_cue_reads_past_the_end(data):
+    with pytest.raises(ValueError, match="truncated"):
+        cue(data)
+
+def test_cue_every_truncation():
+    data = jam_bytes(parse("[[1 2] 3 [1 2] 12345678901234567890 0]"))
+    for end in range(len(data)):
+        with pytest.raises(ValueError):
+            cue(data[:end])
+
+def test_jam_file_round_trip(tmp_path):
+    x = 0
+    for i in range(20000):
+        x = Cell(Cell(i, 1 << 64), x)
+    path = tmp_path / "x.jam"
+    size = jam_to_file(x, path)
+    assert size == path.stat().st_size
+    assert path.read_bytes() == jam_bytes(x)
+    assert jam(cue_from_file(path)) == jam(x)
+    with open(path, 'rb') as f:
+        assert jam(cue_from_file(f, use_mmap=False)) == jam(x)
+
+def test_cue_from_empty_file(tmp_path):
+    path = tmp_path / "empty.jam"
+    path.write_bytes(b'')
+    with pytest.raises(ValueError, match="truncated"):
+        cue_from_file(path)
+
+@pytest.mark.parametrize('use_mmap', [True, False])
+def test_cue_from_file_position(tmp_path, use_mmap):
+    x = parse("[[1 2] 3 4]")
+    path = tmp_path / "x.jam"
+    path.write_bytes(b'header' + jam_bytes(x))
+    with open(path, 'rb') as f:
+        assert f.read(6) == b'header'
+        assert cue_from_file(f, use_mmap) == x
+        assert f.read() == b''
@@ -0,0 +1,74 @@
+import pytest
+from pinochle import *
+from pinochle import jets
+
+# Gate core [arm sample context]: decrements its sample by counting up
+DEC_ARM = "[8 [1 0] 8 [1 6 [5 [0 30] 4 0 6] [0 6] 9 2 [0 2] [4 0 6] 0 7] 9 2 0 1]"
+
+def call_dec(n):
+    # *[[arm n 0] 9 2 0 1]
+    return nock(Cell(parse(DEC_ARM), Cell(n, 0)), parse("[9 2 0 1]"))
+
+@pytest.fixture(autouse=True)
+def reset_jets():
+    yield
+    clear_jets()
+    check_jets(False)
+
+def test_unjetted():
+    assert call_dec(10) == 9
+
+def test_structural_jet():
+    calls = []
+    def spy(core):
+        calls.append(core)
+        return jets.dec(core)
+    register_jet(parse(DEC_ARM), spy)
+    assert call_dec(1000000) == 999999
+    assert len(calls) == 1
+
+def test_mug_jet():
+    register_mug_jet(mug(parse(DEC_ARM)), jets.dec)
+    assert call_dec(1000000) == 999999
+
+def test_punt_falls_back_to_nock():
+    register_jet(parse(DEC_ARM), lambda core: None)
+    assert call_dec(10) == 9
+
+def test_checked_jet_matches():
+    register_jet(parse(DEC_ARM), jets.dec, check=True)
+    assert call_dec(10) == 9
+
+def test_checked_jet_mismatch():
+    register_jet(parse(DEC_ARM), lambda core: 0, name='wrong')
+    check_jets()
+    with pytest.raises(Exception, match="jet mismatch: wrong"):
+        call_dec(10)
+
+def test_fast_hint_binds_declared_jet():
+    # [8 [11 [%fast 1 %dec 0] 1 arm 0 0] 9 2 10 [6 1 n] 0 2]
+    gate = Cell(11, Cell(Cell(jets.FAST, Cell(1, Cell(cord('dec'), 0))),
+                         Cell(1, Cell(parse(DEC_ARM), Cell(0, 0)))))
+    formula = Cell(8, Cell(gate, parse("[9 2 10 [6 1 1000000] 0 2]")))
+    assert nock(0, formula) == 999999
+    assert find_jet(parse(DEC_ARM)).name == 'dec'
+
+# Format: (jet, sample_str, expected)
+STDLIB_TESTS = [
+    (jets.dec, "5", 4), (jets.dec, "0", None),
+    (jets.add, "[2 3]", 5), (jets.sub, "[5 3]", 2), (jets.sub, "[3 5]", None),
+    (jets.mul, "[4 5]", 20), (jets.div, "[7 2]", 3), (jets.div, "[7 0]", None),
+    (jets.mod, "[7 2]", 1), (jets.lth, "[1 2]", 0), (jets.lth, "[2 1]", 1),
+    (jets.lte, "[2 2]", 0), (jets.gth, "[2 1]", 0), (jets.gte, "[1 2]", 1),
+    (jets.STDLIB['max'], "[1 2]", 2), (jets.STDLIB['min'], "[1 2]", 1),
+    (jets.bex, "4", 16),
+    (jets.con, "[5 2]", 7), (jets.dis, "[5 4]", 4), (jets.mix, "[5 4]", 1),
+    (jets.cap, "2", 2), (jets.cap, "13", 3), (jets.cap, "1", None),
+    (jets.mas, "2", 1), (jets.mas, "13", 5), (jets.mas, "7", 3),
+    (jets.peg, "[3 5]", 13), (jets.peg, "[2 1]", 2),
+    (jets.add, "[[1 2] 3]", None),
+]
+
+@pytest.mark.parametrize("jet,sample_str,expected", STDLIB_TESTS)
+def test_stdlib(jet, sample_str, expected):
+    assert jet(Cell(0, Cell(parse(sample_str), 0))) == expected
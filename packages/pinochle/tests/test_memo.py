@@ -0,0 +1,57 @@
+import pytest
+from pinochle import *
+
+MEMO = cord('memo')
+
+DEC = "[8 [1 0] 8 [1 6 [5 [0 7] 4 0 6] [0 6] 9 2 [0 2] [4 0 6] 0 7] 9 2 0 1]"
+# *[[a b] ADD] = a + b
+ADD = "[8 [1 0] 8 [1 6 [5 [0 6] 0 15] [0 14] 9 2 [0 2] [4 0 6] [4 0 14] 0 15] 9 2 0 1]"
+
+def fib_arm(memo):
+    # against the core [arm n]:
+    # ?:  (lth n 2)  n  (add $(n (dec n)) $(n (dec (dec n))))
+    body = parse(
+        "[6 [5 [1 0] 0 3] [0 3] 6 [5 [1 1] 0 3] [0 3] "
+        "7 [[9 2 [0 2] 7 [0 3] %(dec)s] 9 2 [0 2] 7 [7 [0 3] %(dec)s] %(dec)s] "
+        "%(add)s]" % {'dec': DEC, 'add': ADD})
+    if memo:
+        body = Cell(11, Cell(Cell(MEMO, Cell(1, 0)), body))
+    return body
+
+def fib(n, memo):
+    return nock(Cell(fib_arm(memo), n), parse("[9 2 0 1]"))
+
+@pytest.fixture(autouse=True)
+def fresh_memo():
+    clear_memo_cache()
+    yield
+    clear_memo_cache()
+    set_memo_cache_size(4096)
+
+def test_fib_without_memo():
+    assert fib(10, False) == 55
+    assert memo_stats()['hits'] == 0
+
+def test_fib_with_memo():
+    assert fib(10, True) == 55
+    stats = memo_stats()
+    assert stats['misses'] == 11
+    assert stats['hits'] == 8
+
+def test_memo_hit_across_calls():
+    formula = Cell(11, Cell(Cell(MEMO, Cell(1, 0)), parse("[4 0 1]")))
+    assert nock(41, formula) == 42
+    assert nock(41, formula) == 42
+    assert memo_stats()['hits'] == 1
+
+def test_memo_evaluates_clue():
+    formula = Cell(11, Cell(Cell(MEMO, parse("[0 0]")), parse("[4 0 1]")))
+    with pytest.raises(Exception):
+        nock(41, formula)
+
+def test_memo_cache_is_bounded():
+    set_memo_cache_size(2)
+    formula = Cell(11, Cell(Cell(MEMO, Cell(1, 0)), parse("[4 0 1]")))
+    for i in range(10):
+        nock(i, formula)
+    assert memo_stats()['size'] == 2
@@ -0,0 +1,69 @@
+import re
+import pytest
+from pinochle import *
+
+# Decrement: *[n DEC] = n - 1, by counting up from 0 in a tail-recursive arm
+DEC = "[8 [1 0] 8 [1 6 [5 [0 7] 4 0 6] [0 6] 9 2 [0 2] [4 0 6] 0 7] 9 2 0 1]"
+
+# Format: (subject_str, formula_str, expected_str, description)
+EVAL_TESTS = [
+    ("[1 2]", "[[0 3] 0 2]", "[2 1]", "autocons"),
+    ("[[4 0 1] 41]", "[2 [0 3] 0 2]", "42", "opcode 2"),
+    ("[1 2]", "[3 0 1]", "0", "opcode 3 on cell"),
+    ("[1 2]", "[5 [0 2] 4 0 2]", "1", "opcode 5 unequal"),
+    ("0", "[6 [1 0] [1 11] 1 12]", "11", "opcode 6 yes"),
+    ("0", "[6 [1 1] [1 11] 1 12]", "12", "opcode 6 no"),
+    ("0", "[6 [2 [1 0] 1 1 0] [1 11] 1 12]", "11", "opcode 6 yes, stacked"),
+    ("0", "[6 [2 [1 0] 1 1 1] [1 11] 1 12]", "12", "opcode 6 no, stacked"),
+    ("41", "[7 [4 0 1] 4 0 1]", "43", "opcode 7"),
+    ("41", "[8 [4 0 1] 0 1]", "[42 41]", "opcode 8"),
+    ("[[4 0 3] 41]", "[9 2 0 1]", "42", "opcode 9"),
+    ("[1 2 3]", "[10 [2 1 9] 0 1]", "[9 2 3]", "opcode 10"),
+    ("7", "[11 [1 [4 0 1]] 0 1]", "7", "opcode 11 dynamic"),
+    ("7", "[11 1 0 1]", "7", "opcode 11 static"),
+    ("42", DEC, "41", "decrement"),
+]
+
+CRASH_TESTS = [
+    ("0", "7", "crash: invalid formula (atom)"),
+    ("0", "[12 0 1]", "Unknown opcode: 12"),
+    ("0", "[6 [1 2] [1 11] 1 12]", "fail: atom"),
+    ("0", "[6 [1 2 3] [1 11] 1 12]", "fail: cell"),
+    # the same through the evaluator's stack rather than a closure
+    ("0", "[6 [2 [1 0] 1 1 2] [1 11] 1 12]", "fail: atom"),
+    ("0", "[6 [2 [1 0] 1 1 2 3] [1 11] 1 12]", "fail: cell"),
+    ("0", "[6 [2 [1 0] 1 1 7] [1 11] 1 12]", "fail: atom"),
+    ("0", "[10 1 0 1]", "Opcode 10 requires [b c] as first argument"),
+    ("[1 2]", "[4 0 1]", "fail: cell"),
+    ("[1 2]", "[4 2 [0 1] 1 0 1]", "fail: cell"),
+    ("[1 2]", "[0 [1 2]]", "fas: first argument must be atom"),
+    ("[1 2]", "[0 6]", "fail: atom"),
+    ("[1 2]", "[10 [6 1 0] 0 1]", "fail: atom"),
+]
+
+@pytest.mark.parametrize("subject_str,formula_str,expected_str,description",
+                         EVAL_TESTS)
+def test_eval(subject_str, formula_str, expected_str, description):
+    assert nock(parse(subject_str), parse(formula_str)) == parse(expected_str)
+
+@pytest.mark.parametrize("subject_str,formula_str,message", CRASH_TESTS)
+def test_crash(subject_str, formula_str, message):
+    with pytest.raises(Exception, match=re.escape(message)):
+        nock(parse(subject_str), parse(formula_str))
+
+def test_converts_python_values_at_the_boundary():
+    assert nock((41, 1), (4, 0, 2)) == 42
+    assert nock(0, ((1, 2), 1, 3)) == Cell(2, 3)
+
+def test_tail_recursive_loop_is_stack_safe():
+    assert nock(10000, parse(DEC)) == 9999
+
+def test_deep_autocons_is_stack_safe():
+    formula = Cell(1, 0)
+    for i in range(5000):
+        formula = Cell(Cell(1, i), formula)
+    result = nock(0, formula)
+    for i in reversed(range(5000)):
+        assert result.head == i
+        result = result.tail
+    assert result == 0
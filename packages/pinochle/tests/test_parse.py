@@ -0,0 +1,86 @@
+import io
+import re
+import sys
+import pytest
+from pinochle import *
+
+# Format: (text, expected_str)
+PARSE_TESTS = [
+    ("", "0"),
+    ("[]", "0"),
+    ("42", "42"),
+    ("1.024", "1024"),
+    ("1.", "1"),
+    ("[1  2]", "[1 2]"),
+    (" [1 2] ", "[1 2]"),
+    ("1 2 3", "[1 2 3]"),
+    ("[[1 2] [] 3]", "[[1 2] 0 3]"),
+]
+
+# Format: (text, message)
+ERROR_TESTS = [
+    ("]", "unmatched ] at 0"),
+    ("[1 2]]", "unmatched ] at 5"),
+    (". 1", "floating dot at 0"),
+    ("[1 .2]", "floating dot at 3"),
+    ("[1 2a]", "unrecognized character a at 4"),
+    ("1\n", "unrecognized character \n at 1"),
+    ("1.x ]", "unrecognized character x at 2"),
+    ("[1 [2 3]", "unclosed [ at 0"),
+    ("[1 [2 3] 4 [5", "unclosed [ at 11"),
+]
+
+@pytest.fixture
+def small_chunks():
+    noun = sys.modules['pinochle.noun']
+    size = noun._PARSE_CHUNK
+    noun._PARSE_CHUNK = 3
+    yield
+    noun._PARSE_CHUNK = size
+
+@pytest.mark.parametrize("text,expected_str", PARSE_TESTS)
+def test_parse(text, expected_str, small_chunks):
+    expected = parse(expected_str)
+    assert parse(text) == expected
+    assert parse(text.encode()) == expected
+    assert parse(io.StringIO(text)) == expected
+    assert parse(io.BytesIO(text.encode())) == expected
+
+@pytest.mark.parametrize("text,message", ERROR_TESTS)
+def test_parse_errors(text, message, small_chunks):
+    for source in (text, text.encode(), io.StringIO(text)):
+        with pytest.raises(ValueError, match=re.escape(message)):
+            parse(source)
+
+def test_parse_deep_nesting():
+    depth = 100000
+    x = parse('[' * depth + '1' + ' 2]' * depth)
+    for _ in range(depth):
+        assert x.tail == 2
+        x = x.head
+    assert x == 1
+
+def test_parse_file(tmp_path):
+    n = Cell(Cell(1, 2), Cell(123456789, Cell(0, 1 << 70)))
+    path = tmp_path / 'noun.txt'
+    path.write_text(str(n))
+    with open(path, 'rb') as f:
+        assert parse(f) == n
+    with open(path) as f:
+        assert parse(f) == n
+
+def test_parse_interns():
+    table = HashCons()
+    x = parse('[[1 2] [1 2] [3 [1 2]]]', table)
+    assert x.head is x.tail.head is x.tail.tail.tail
+    assert x.head is table.cons(1, 2)
+
+def test_parse_names():
+    x = parse('[1 2 3]')
+    names = {'x': x, 'my-var': 7}
+    y = parse('[x [0 my-var] x]', names=names)
+    assert y.head is x and y.tail.tail is x
+    assert y.tail.head == Cell(0, 7)
+    assert parse('x', names=names) is x
+    with pytest.raises(ValueError, match='unrecognized character y at 3'):
+        parse('[x y]', names=names)
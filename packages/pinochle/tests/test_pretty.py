@@ -0,0 +1,38 @@
+import io
+import pytest
+from pinochle import *
+
+# Format: (noun_str, limits, expected)
+LIMIT_TESTS = [
+    ("[1 2 3 4 5]", {}, "[1 2 3 4 5]"),
+    ("[1 2 3 4 5]", {"max_items": 2}, "[1 2 ... 3 more]"),
+    ("[1 2 3 4 5]", {"max_items": 5}, "[1 2 3 4 5]"),
+    ("[[1 2 3] 4 5]", {"max_items": 1}, "[[1 ... 2 more] ... 2 more]"),
+    ("[1 [2 [3 4]] 5]", {"max_depth": 1}, "[1 [...] 5]"),
+    ("[1 2]", {"max_depth": 0}, "[...]"),
+    ("[1 2 3]", {"max_length": 3}, "[1 ..."),
+    ("[1 2 3]", {"max_length": 7}, "[1 2 3]"),
+    ("123456", {"max_length": 2}, "12..."),
+]
+
+@pytest.mark.parametrize("noun_str,limits,expected", LIMIT_TESTS)
+def test_pretty_limits(noun_str, limits, expected):
+    assert pretty(parse(noun_str), False, **limits) == expected
+
+def test_pretty_long_list():
+    n = parse(' '.join(map(str, range(100000))))
+    text = pretty(n, False)
+    assert text == '[' + ' '.join(map(str, range(100000))) + ']'
+    assert len(list(pretty_chunks(n))) > 1
+
+def test_pretty_deep_heads():
+    n = 0
+    for _ in range(10000):
+        n = Cell(n, 1)
+    assert str(n) == '[' * 10000 + '0' + ' 1]' * 10000
+
+def test_pretty_into():
+    out = io.StringIO()
+    n = parse('[1 [2 3] 4]')
+    assert pretty_into(n, out.write, max_items=2) == len(out.getvalue())
+    assert out.getvalue() == '[1 [2 3] ... 1 more]'
@@ -0,0 +1,58 @@
+import pytest
+from pinochle import *
+
+# Decrement: *[n DEC] = n - 1, by counting up from 0 in a tail-recursive arm
+DEC = "[8 [1 0] 8 [1 6 [5 [0 7] 4 0 6] [0 6] 9 2 [0 2] [4 0 6] 0 7] 9 2 0 1]"
+
+# Format: (subject_str, formula_str, ops, cells)
+PROFILE_TESTS = [
+    ("41", "[4 0 1]", {'4': 1, '0': 1}, 0),
+    ("[1 2]", "[[0 3] 0 2]", {'cons': 1, '0': 2}, 1),
+    ("0", "[6 [1 0] [1 11] 1 12]", {'6': 1, '1': 2}, 0),
+    ("41", "[8 [4 0 1] 0 1]", {'8': 1, '4': 1, '0': 2}, 1),
+    ("[1 2 3]", "[10 [6 1 9] 0 1]", {'10': 1, '1': 1, '0': 1}, 2),
+    ("7", "[11 1 0 1]", {'0': 1}, 0),
+]
+
+@pytest.mark.parametrize("subject_str,formula_str,ops,cells", PROFILE_TESTS)
+def test_profile_counts(subject_str, formula_str, ops, cells):
+    p = Profile()
+    expected = nock(parse(subject_str), parse(formula_str))
+    assert nock(parse(subject_str), parse(formula_str), profile=p) == expected
+    assert {k: v for k, v in p.ops.items() if v} == ops
+    assert p.steps == sum(ops.values())
+    assert p.cells == cells
+
+def test_profile_loop():
+    p = Profile()
+    assert nock(100, parse(DEC), profile=p) == 99
+    # 12 steps per iteration: the test (6 5 0 4 0) and the call
+    # (9, then [0 2] [[4 0 6] 0 7])
+    assert p.steps == 1200
+    assert p.ops['9'] == 100
+    assert p.max_depth == 4
+    assert sum(p.seconds.values()) > 0
+    # the loop's arm is the hottest formula, entered once per iteration
+    assert p.hot(1)[0][1] == 100
+
+def test_profile_sample():
+    seen = []
+    p = Profile(sample=lambda m, f: seen.append((m, f)), every=10)
+    nock(100, parse(DEC), profile=p)
+    assert len(seen) == p.entered // 10
+    assert all(m == mug(f) for m, f in seen)
+
+def test_profile_accumulates_and_resets():
+    p = Profile(timing=False)
+    nock(41, parse("[4 0 1]"), profile=p)
+    nock(41, parse("[4 0 1]"), profile=p)
+    assert p.steps == 4
+    assert p.seconds['4'] == 0
+    p.reset()
+    assert p.steps == 0 and p.formulas == {}
+
+def test_profile_crash_still_counts():
+    p = Profile()
+    with pytest.raises(Exception):
+        nock(0, parse("[0 2]"), profile=p)
+    assert p.ops['0'] == 1